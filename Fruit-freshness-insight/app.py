@@ -1,4 +1,5 @@
 # app.py - FINAL ROBUST VERSION
+import os
 import cv2
 import numpy as np
 import tensorflow as tf
@@ -7,12 +8,46 @@ from PIL import Image
 RIPENESS_CLASSES = ['Unripe', 'Ripe', 'Overripe', 'Not Fruit']
 FRUIT_TYPES = ['Apple', 'Orange']
 
+# Inference configuration
+COMPILED_INFERENCE = os.environ.get('COMPILED_INFERENCE', '1') == '1'   # tf.function path instead of model.predict
+INFERENCE_XLA = os.environ.get('INFERENCE_XLA', '0') == '1'             # XLA JIT for the compiled path
+TF_INTRA_OP_THREADS = int(os.environ.get('TF_INTRA_OP_THREADS', '0'))   # 0 = let TensorFlow decide
+TF_INTER_OP_THREADS = int(os.environ.get('TF_INTER_OP_THREADS', '0'))
+WARMUP_BATCH_SIZES = [int(b) for b in os.environ.get('WARMUP_BATCH_SIZES', '1,16').split(',') if b]
+
+# Thread pools can only be sized before TensorFlow runs its first op
+if TF_INTRA_OP_THREADS:
+    tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+if TF_INTER_OP_THREADS:
+    tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+
 def load_model():
     model_path = 'fruit_ripeness_with_person_rejection_IMPROVED.keras'
     return tf.keras.models.load_model(model_path)
 
 model = load_model()
 
+# Fixed input signature: one traced graph serves every batch size
+# (XLA still compiles once per distinct batch size, hence the warmup)
+@tf.function(input_signature=[tf.TensorSpec(shape=(None, 224, 224, 3), dtype=tf.float32)],
+             jit_compile=INFERENCE_XLA)
+def _compiled_infer(batch):
+    return model(batch, training=False)
+
+def run_model(batch):
+    """Model outputs for a preprocessed (N, 224, 224, 3) batch, as numpy arrays."""
+    if not COMPILED_INFERENCE:
+        return model.predict(batch, verbose=0)
+    outputs = _compiled_infer(tf.convert_to_tensor(batch, dtype=tf.float32))
+    return [output.numpy() for output in outputs]
+
+def warmup(batch_sizes=WARMUP_BATCH_SIZES):
+    for size in batch_sizes:
+        run_model(np.zeros((size, 224, 224, 3), dtype='float32'))
+
+if COMPILED_INFERENCE:
+    warmup()
+
 def preprocess_image(image_pil):
     img = np.array(image_pil)
     if len(img.shape) == 2:
@@ -26,9 +61,22 @@ def preprocess_image(image_pil):
 
 def get_prediction(image_pil):
     processed = preprocess_image(image_pil)
-    predictions = model.predict(processed, verbose=0)
-    ripeness_probs = predictions[0][0]
-    fruit_probs = predictions[1][0]
+    predictions = run_model(processed)
+    return interpret_prediction(predictions[0][0], predictions[1][0])
+
+def get_predictions(images_pil):
+    """Batched get_prediction: one model call for all images."""
+    if not images_pil:
+        return []
+    batch = np.concatenate([preprocess_image(img) for img in images_pil], axis=0)
+    predictions = run_model(batch)
+    return [interpret_prediction(predictions[0][i], predictions[1][i])
+            for i in range(len(images_pil))]
+
+def interpret_prediction(ripeness_probs, fruit_probs):
+    """Turn raw model probabilities for one image into the result dict."""
+    ripeness_probs = np.asarray(ripeness_probs)
+    fruit_probs = np.asarray(fruit_probs)
     
     # ✅ CONSERVATIVE BOOST: Only 15% (was 40%)
     OVERRIPE_BOOST = 1.15
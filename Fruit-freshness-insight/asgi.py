@@ -0,0 +1,182 @@
+# asgi.py - Async serving mode for the I/O-bound routes
+# Run with: uvicorn asgi:app --port 5000
+#
+# The upload routes (/predict, /predict_crate, /ingest_stream) and /read_sensor
+# are native async handlers: uploads are received without holding a thread,
+# and blocking work (decode + inference, serial reads, CSV writes) runs in
+# bounded executors. Every other route is the unchanged Flask app mounted
+# behind a WSGI adapter, so slow uploads never occupy its WSGI_WORKERS.
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from a2wsgi import WSGIMiddleware
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import backend
+from app import get_prediction
+from crate import predict_crate, GRID_ROWS, GRID_COLS, MIN_SATURATION
+from stream_ingest import (ingest_stream, ingest_dir_path, check_settings, SAMPLE_FPS, DIFF_THRESHOLD,
+                           BATCH_SIZE)
+
+# Inference is CPU-bound, so keep its pool small; sensor reads mostly sleep
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '2'))
+IO_WORKERS = int(os.environ.get('IO_WORKERS', '8'))
+WSGI_WORKERS = int(os.environ.get('WSGI_WORKERS', '10'))
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='io')
+
+# The serial port is a single device; queue readers instead of opening it concurrently
+sensor_lock = asyncio.Lock()
+
+
+def _param(request, form, name, default=None, type=str):
+    """Like Flask's request.values.get(name, default, type=...): query first, bad values -> default."""
+    value = request.query_params.get(name, form.get(name))
+    if not isinstance(value, str):
+        return default
+    try:
+        return type(value)
+    except ValueError:
+        return default
+
+
+def _decode_and_predict(data):
+    img = Image.open(io.BytesIO(data))
+    return get_prediction(img)
+
+
+def _decode_and_predict_crate(data, **params):
+    img = Image.open(io.BytesIO(data))
+    return predict_crate(img, **params)
+
+
+def _save_upload(upload, suffix):
+    """Copy a spooled upload to a named temp file (OpenCV needs a path)."""
+    upload.file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(upload.file, tmp)
+    return tmp.name
+
+
+async def predict(request):
+    # Closing the form closes the spooled temp files behind large uploads
+    async with request.form() as form:
+        upload = form.get('image')
+        if upload is None or isinstance(upload, str):
+            return JSONResponse({'error': 'No image uploaded'}, status_code=400)
+        data = await upload.read()
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(inference_executor, _decode_and_predict, data)
+
+    # Save to CSV
+    entry = backend.make_entry(result, 'Camera/Upload', datetime.now())
+    [result['result_id']] = await loop.run_in_executor(io_executor, backend.append_results, [entry])
+
+    return JSONResponse(result)
+
+
+async def predict_crate_route(request):
+    async with request.form() as form:
+        upload = form.get('image')
+        if upload is None or isinstance(upload, str):
+            return JSONResponse({'error': 'No image uploaded'}, status_code=400)
+        data = await upload.read()
+        params = {
+            'rows': _param(request, form, 'rows', GRID_ROWS, int),
+            'cols': _param(request, form, 'cols', GRID_COLS, int),
+            'tile_size': _param(request, form, 'tile_size', None, int),
+            'stride': _param(request, form, 'stride', None, int),
+            'bg_filter': _param(request, form, 'bg_filter', 'color'),
+            'min_saturation': _param(request, form, 'min_saturation', MIN_SATURATION, float),
+        }
+
+    loop = asyncio.get_running_loop()
+    try:
+        tiles, summary = await loop.run_in_executor(
+            inference_executor, partial(_decode_and_predict_crate, data, **params))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    await loop.run_in_executor(io_executor, backend.save_crate_tiles, tiles)
+    return JSONResponse({'tiles': tiles, 'summary': summary})
+
+
+async def ingest_stream_route(request):
+    loop = asyncio.get_running_loop()
+    tmp_path = None
+    async with request.form() as form:
+        sample_fps = _param(request, form, 'sample_fps', SAMPLE_FPS, float)
+        diff_threshold = _param(request, form, 'diff_threshold', DIFF_THRESHOLD, float)
+        batch_size = _param(request, form, 'batch_size', BATCH_SIZE, int)
+        try:
+            check_settings(sample_fps, batch_size)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        upload = form.get('video')
+        source_name = _param(request, form, 'source')
+        if upload is not None and not isinstance(upload, str):
+            tmp_path = await loop.run_in_executor(
+                io_executor, _save_upload, upload, backend.video_suffix(upload.filename))
+            source = tmp_path
+        elif source_name:
+            try:
+                source = ingest_dir_path(source_name)
+            except ValueError as e:
+                return JSONResponse({'error': str(e)}, status_code=400)
+        else:
+            return JSONResponse({'error': 'No video or source provided'}, status_code=400)
+
+    try:
+        items, stats = await loop.run_in_executor(
+            inference_executor, ingest_stream, source, sample_fps, diff_threshold, batch_size)
+    except (ValueError, OSError) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    await loop.run_in_executor(io_executor, backend.save_stream_items, items, stats)
+    return JSONResponse({'items': items, 'stats': stats})
+
+
+async def read_sensor(request):
+    if not backend.SERIAL_AVAILABLE:
+        return JSONResponse({'error': 'PySerial not installed'}, status_code=500)
+
+    loop = asyncio.get_running_loop()
+    try:
+        async with sensor_lock:
+            temp, hum = await loop.run_in_executor(io_executor, backend.read_sensor_values)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    if temp is None or hum is None:
+        return JSONResponse({'error': 'No valid sensor data'}, status_code=400)
+
+    return JSONResponse({'temperature': temp, 'humidity': hum})
+
+
+app = Starlette(
+    routes=[
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict_crate', predict_crate_route, methods=['POST']),
+        Route('/ingest_stream', ingest_stream_route, methods=['POST']),
+        Route('/read_sensor', read_sensor, methods=['POST']),
+        Mount('/', app=WSGIMiddleware(backend.app, workers=WSGI_WORKERS)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+)
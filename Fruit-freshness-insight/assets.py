@@ -0,0 +1,58 @@
+# assets.py - Serve the optimized frontend build (see build_assets.py)
+import mimetypes
+import os
+
+from flask import request, send_file, abort
+from werkzeug.security import safe_join
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
+BUILD_DIR = os.path.join(FRONTEND_DIR, 'build')
+ASSET_DIR = os.path.join(BUILD_DIR, 'assets')
+MANIFEST_FILE = os.path.join(BUILD_DIR, 'manifest.json')
+
+# Hashed file names never change content, so browsers may cache them forever
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+
+def serve_asset(filename):
+    path = safe_join(ASSET_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    vary, encoding = [], None
+
+    # AVIF variant of the same image only when the browser lists it explicitly;
+    # image/* and */* match any type but say nothing about AVIF decoding
+    if filename.endswith('.webp'):
+        vary.append('Accept')
+        avif = path[:-len('.webp')] + '.avif'
+        if 'image/avif' in request.accept_mimetypes.values() and os.path.isfile(avif):
+            path, mimetype = avif, 'image/avif'
+
+    # Precompressed text assets: no compression work per request
+    if filename.endswith(('.css', '.js')):
+        vary.append('Accept-Encoding')
+        for enc, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[enc] and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, enc
+                break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=31536000)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    for header in vary:
+        response.vary.add(header)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response
+
+
+def init_assets(app):
+    """Serve pages and assets from frontend/build when it has been built."""
+    if not os.path.exists(MANIFEST_FILE):
+        return
+    app.template_folder = BUILD_DIR
+    app.add_url_rule('/assets/<path:filename>', 'asset', serve_asset)
+    print("📦 Serving optimized frontend build")
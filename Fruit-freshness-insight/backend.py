@@ -1,7 +1,16 @@
 # backend.py - COMPLETE VERSION with comprehensive chart generation
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, request, jsonify, render_template, send_file, Response, stream_with_context
 from flask_cors import CORS
 from app import get_prediction, RIPENESS_CLASSES, FRUIT_TYPES
+from crate import predict_crate, GRID_ROWS, GRID_COLS, MIN_SATURATION
+from stream_ingest import (ingest_stream, ingest_dir_path, check_settings, SAMPLE_FPS, DIFF_THRESHOLD,
+                           BATCH_SIZE, VIDEO_EXTENSIONS)
+from profiler import init_profiler
+from assets import init_assets
+from shelf_life import compute_shelf_life, expiry_epochs, ExpiryIndex
+from serialization import json_response, records
+from export import (parse_filters, generate_export, export_etag, materialize_export,
+                    EXPORT_FORMATS, PARQUET_AVAILABLE)
 from PIL import Image
 import os
 import pandas as pd
@@ -9,6 +18,9 @@ from datetime import datetime
 import re
 import io
 import numpy as np
+import tempfile
+import threading
+from contextlib import contextmanager
 
 # Serial communication for IoT
 try:
@@ -17,12 +29,16 @@ try:
 except:
     SERIAL_AVAILABLE = False
 
-# Plotly for chart generation
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.utils
-import json
+# Cross-process lock on the results CSV (POSIX only; elsewhere results_lock
+# only protects this process)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Aggregated chart data for the dashboard
+from chart_specs import build_chart_specs, CHART_SCHEMA_VERSION
 
 # Frontend path configuration
 frontend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
@@ -33,22 +49,63 @@ app = Flask(__name__,
             static_url_path='')
 
 CORS(app)
+init_profiler(app)
+init_assets(app)
 
 # CSV configuration
 CSV_FILE = 'fruit_analysis_results.csv'
+CSV_LOCK_FILE = CSV_FILE + '.lock'
 result_counter = 0
+results_lock = threading.Lock()
+# (size, mtime) of the CSV after our last append; anything else means another
+# process (e.g. the stream_ingest CLI) wrote to it and result_counter is stale
+_counter_stamp = None
+CSV_COLUMNS = [
+    'ID', 'Timestamp', 'Date', 'Time', 'Source', 'Is_Fruit',
+    'Fruit_Type', 'Fruit_Confidence', 'Ripeness', 'Ripeness_Confidence',
+    'Temperature_C', 'Humidity_pct', 'Shelf_Life', 'Expiry_Timestamp'
+]
+# Mostly-empty columns would otherwise be read back as float64 NaN
+RESULT_DTYPES = {'Shelf_Life': 'string', 'Expiry_Timestamp': 'Int64'}
+
+def read_results():
+    return pd.read_csv(CSV_FILE, dtype=RESULT_DTYPES)
+
+@contextmanager
+def locked_results():
+    """Exclusive access to the CSV for any read-modify-write, across threads and processes."""
+    with results_lock:
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(CSV_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 # Initialize CSV
-if os.path.exists(CSV_FILE):
-    df = pd.read_csv(CSV_FILE)
-    result_counter = len(df)
-else:
-    df = pd.DataFrame(columns=[
-        'ID', 'Timestamp', 'Date', 'Time', 'Source', 'Is_Fruit',
-        'Fruit_Type', 'Fruit_Confidence', 'Ripeness', 'Ripeness_Confidence',
-        'Temperature_C', 'Humidity_pct', 'Shelf_Life'
-    ])
-    df.to_csv(CSV_FILE, index=False)
+with locked_results():
+    if os.path.exists(CSV_FILE):
+        df = pd.read_csv(CSV_FILE)
+        
+        # Files from before server-side shelf life lack the newer columns or hold
+        # Expiry_Timestamp as a date string; migrate them once, keeping column order
+        missing = [col for col in CSV_COLUMNS if col not in df.columns]
+        if missing or (df['Expiry_Timestamp'].dtype == object and df['Expiry_Timestamp'].notna().any()):
+            df = df.reindex(columns=list(df.columns) + missing)
+            df['Expiry_Timestamp'] = expiry_epochs(df['Expiry_Timestamp'])
+            df.to_csv(CSV_FILE, index=False)
+            print(f"🔧 Migrated {CSV_FILE} to the current columns")
+        df = read_results()
+    else:
+        df = pd.DataFrame(columns=CSV_COLUMNS)
+        df.to_csv(CSV_FILE, index=False)
+
+# Sorted expiry index for "expiring soon" lookups
+expiry_index = ExpiryIndex()
+expiry_index.rebuild(df)
 
 # ==================== ROUTES ==================== #
 
@@ -72,29 +129,16 @@ def dashboard():
 def history():
     return render_template('history.html')
 
-# ==================== PREDICTION ==================== #
+# ==================== RESULT STORAGE ==================== #
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    global result_counter
-    
-    if 'image' not in request.files:
-        return jsonify({'error': 'No image uploaded'}), 400
-    
-    file = request.files['image']
-    img = Image.open(file.stream)
-    result = get_prediction(img)
-    
-    # Save to CSV
-    result_counter += 1
-    timestamp = datetime.now()
-    
-    entry = {
-        'ID': result_counter,
+def make_entry(result, source, timestamp):
+    """CSV row for one prediction result (ID is assigned by append_results)."""
+    return {
+        'ID': None,
         'Timestamp': timestamp.strftime("%Y-%m-%d %H:%M:%S"),
         'Date': timestamp.strftime("%Y-%m-%d"),
         'Time': timestamp.strftime("%H:%M:%S"),
-        'Source': 'Camera/Upload',
+        'Source': source,
         'Is_Fruit': result.get('is_fruit', True),
         'Fruit_Type': result.get('fruit', 'N/A'),
         'Fruit_Confidence': round(result.get('fruit_conf', 0) * 100, 2),
@@ -102,17 +146,140 @@ def predict():
         'Ripeness_Confidence': round(result.get('ripeness_conf', 0) * 100, 2),
         'Temperature_C': None,
         'Humidity_pct': None,
-        'Shelf_Life': None
+        'Shelf_Life': None,
+        'Expiry_Timestamp': None
     }
+
+def append_results(entries):
+    """Assign IDs and append all entries to the CSV in one write. Returns the IDs."""
+    global result_counter, _counter_stamp
+    
+    with locked_results():
+        # IDs come from the file itself, so another process appending in between is seen
+        stat = os.stat(CSV_FILE)
+        if (stat.st_size, stat.st_mtime_ns) != _counter_stamp:
+            existing = pd.read_csv(CSV_FILE, usecols=['ID'])['ID']
+            result_counter = int(existing.max()) if len(existing) else 0
+        ids = list(range(result_counter + 1, result_counter + len(entries) + 1))
+        for entry, result_id in zip(entries, ids):
+            entry['ID'] = result_id
+        
+        columns = pd.read_csv(CSV_FILE, nrows=0).columns
+        pd.DataFrame(entries).reindex(columns=columns).to_csv(CSV_FILE, mode='a', header=False, index=False)
+        result_counter += len(entries)
+        stat = os.stat(CSV_FILE)
+        _counter_stamp = (stat.st_size, stat.st_mtime_ns)
+    
+    return ids
+
+def save_crate_tiles(tiles):
+    """One bulk insert for all fruit tiles; sets each tile's result_id."""
+    timestamp = datetime.now()
+    fruit_tiles = [t for t in tiles if t.get('is_fruit')]
+    if fruit_tiles:
+        ids = append_results([make_entry(t, 'Crate/Tiled', timestamp) for t in fruit_tiles])
+        for tile, result_id in zip(fruit_tiles, ids):
+            tile['result_id'] = result_id
+
+def save_stream_items(items, stats):
+    """One bulk write for every item found in a stream; sets each item's result_id."""
+    timestamp = datetime.now()
+    entries = [make_entry(item, 'Video Stream', timestamp) for item in items]
+    if entries:
+        for item, result_id in zip(items, append_results(entries)):
+            item['result_id'] = result_id
     
-    df = pd.read_csv(CSV_FILE)
-    df = pd.concat([df, pd.DataFrame([entry])], ignore_index=True)
-    df.to_csv(CSV_FILE, index=False)
+    print(f"🎞️ Stream ingested: {stats['frames_read']} frames read, "
+          f"{stats['frames_inferred']} inferred, {len(items)} items")
+
+def video_suffix(filename):
+    """Temp-file suffix for an uploaded video; it picks the demuxer, so only plain containers."""
+    suffix = os.path.splitext(filename or '')[1].lower()
+    return suffix if suffix in VIDEO_EXTENSIONS else '.mp4'
+
+# ==================== PREDICTION ==================== #
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image uploaded'}), 400
+    
+    file = request.files['image']
+    img = Image.open(file.stream)
+    result = get_prediction(img)
     
-    result['result_id'] = result_counter
+    # Save to CSV
+    [result['result_id']] = append_results([make_entry(result, 'Camera/Upload', datetime.now())])
     
     return jsonify(result)
 
+# ==================== CRATE IMAGES ==================== #
+
+@app.route('/predict_crate', methods=['POST'])
+def predict_crate_route():
+    """Classify every fruit in a crate photo via grid or sliding-window tiles."""
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image uploaded'}), 400
+    
+    img = Image.open(request.files['image'].stream)
+    try:
+        tiles, summary = predict_crate(
+            img,
+            rows=request.values.get('rows', GRID_ROWS, type=int),
+            cols=request.values.get('cols', GRID_COLS, type=int),
+            tile_size=request.values.get('tile_size', None, type=int),
+            stride=request.values.get('stride', None, type=int),
+            bg_filter=request.values.get('bg_filter', 'color'),
+            min_saturation=request.values.get('min_saturation', MIN_SATURATION, type=float)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    save_crate_tiles(tiles)
+    return jsonify({'tiles': tiles, 'summary': summary})
+
+# ==================== VIDEO STREAM ==================== #
+
+@app.route('/ingest_stream', methods=['POST'])
+def ingest_stream_route():
+    """Ingest an uploaded video ('video' file) or a 'source' file under INGEST_DIR.
+
+    Live sources (URLs, cameras, stdin, FIFOs) are CLI-only: python stream_ingest.py
+    """
+    sample_fps = request.values.get('sample_fps', SAMPLE_FPS, type=float)
+    diff_threshold = request.values.get('diff_threshold', DIFF_THRESHOLD, type=float)
+    batch_size = request.values.get('batch_size', BATCH_SIZE, type=int)
+    try:
+        check_settings(sample_fps, batch_size)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    tmp_path = None
+    if 'video' in request.files:
+        upload = request.files['video']
+        with tempfile.NamedTemporaryFile(suffix=video_suffix(upload.filename), delete=False) as tmp:
+            upload.save(tmp)
+            tmp_path = tmp.name
+        source = tmp_path
+    elif request.values.get('source'):
+        try:
+            source = ingest_dir_path(request.values['source'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        return jsonify({'error': 'No video or source provided'}), 400
+    
+    try:
+        items, stats = ingest_stream(source, sample_fps, diff_threshold, batch_size)
+    except (ValueError, OSError) as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+    
+    save_stream_items(items, stats)
+    return jsonify({'items': items, 'stats': stats})
+
 # ==================== IOT SENSOR ==================== #
 
 @app.route('/read_sensor', methods=['POST'])
@@ -121,23 +288,7 @@ def read_sensor():
         return jsonify({'error': 'PySerial not installed'}), 500
     
     try:
-        esp = serial.Serial('COM5', 115200, timeout=2)
-        import time
-        time.sleep(1.5)
-        
-        temp, hum = None, None
-        for _ in range(40):
-            raw = esp.readline().decode('ascii', errors='ignore').strip()
-            if not raw:
-                continue
-            low = raw.lower()
-            if low.startswith('ets') or 'boot' in low:
-                continue
-            if 'humidity' in low and 'temperature' in low:
-                temp, hum = parse_temp_hum(raw)
-                break
-        
-        esp.close()
+        temp, hum = read_sensor_values()
         
         if temp is None or hum is None:
             return jsonify({'error': 'No valid sensor data'}), 400
@@ -147,6 +298,27 @@ def read_sensor():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def read_sensor_values():
+    """Blocking read of one temperature/humidity line from the ESP board."""
+    esp = serial.Serial('COM5', 115200, timeout=2)
+    import time
+    time.sleep(1.5)
+    
+    temp, hum = None, None
+    for _ in range(40):
+        raw = esp.readline().decode('ascii', errors='ignore').strip()
+        if not raw:
+            continue
+        low = raw.lower()
+        if low.startswith('ets') or 'boot' in low:
+            continue
+        if 'humidity' in low and 'temperature' in low:
+            temp, hum = parse_temp_hum(raw)
+            break
+    
+    esp.close()
+    return temp, hum
+
 def parse_temp_hum(line):
     try:
         clean = line.replace('°', ' ').replace('%', ' ').replace('C', ' ').replace('c', ' ')
@@ -174,16 +346,47 @@ def update_result():
     result_id = data.get('result_id')
     temp = data.get('temperature')
     hum = data.get('humidity')
-    shelf_life = data.get('shelf_life')
     
-    df = pd.read_csv(CSV_FILE)
-    df.loc[df['ID'] == result_id, 'Temperature_C'] = temp
-    df.loc[df['ID'] == result_id, 'Humidity_pct'] = hum
-    df.loc[df['ID'] == result_id, 'Shelf_Life'] = shelf_life
-    df.loc[df['ID'] == result_id, 'Source'] = 'Combined(IoT)'
-    df.to_csv(CSV_FILE, index=False)
+    # Rewriting the whole file must not interleave with appends from other requests
+    with locked_results():
+        df = read_results()
+        mask = df['ID'] == result_id
+        df.loc[mask, 'Temperature_C'] = temp
+        df.loc[mask, 'Humidity_pct'] = hum
+        df.loc[mask, 'Source'] = 'Combined(IoT)'
+        
+        # Shelf life is estimated server-side from ripeness, fruit and sensor data
+        updated = compute_shelf_life(df.loc[mask])
+        df.loc[mask, 'Shelf_Life'] = updated['Shelf_Life']
+        df.loc[mask, 'Expiry_Timestamp'] = updated['Expiry_Timestamp']
+        df.to_csv(CSV_FILE, index=False)
+        
+        shelf_life, expiry = None, None
+        for record in updated.to_dict('records'):
+            expiry_index.update(record)
+            shelf_life, expiry = record['Shelf_Life'], record['Expiry_Timestamp']
+    
+    return jsonify({
+        'success': True,
+        'shelf_life': shelf_life,
+        'expiry_timestamp': None if pd.isna(expiry) else expiry
+    })
+
+# ==================== SHELF LIFE ==================== #
+
+@app.route('/expiring_soon', methods=['GET'])
+def expiring_soon():
+    hours = request.args.get('hours', 24, type=float)
+    return jsonify(expiry_index.expiring_within(hours))
+
+@app.route('/recompute_shelf_life', methods=['POST'])
+def recompute_shelf_life():
+    with locked_results():
+        df = compute_shelf_life(read_results())
+        df.to_csv(CSV_FILE, index=False)
+        expiry_index.rebuild(df)
     
-    return jsonify({'success': True})
+    return jsonify({'success': True, 'records': int(len(df))})
 
 # ==================== DASHBOARD DATA ==================== #
 
@@ -199,201 +402,14 @@ def dashboard_data():
         df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
         df_iot = df[(df['Temperature_C'].notna()) & (df['Humidity_pct'].notna())]
         
-        # ✅ FIX: Handle NaN, bool, and numpy types
-        def clean_for_json(value):
-            # Handle NaN
-            if pd.isna(value):
-                return None
-            if isinstance(value, float) and value != value:  # NaN check
-                return None
-            # ✅ Handle boolean (THIS WAS MISSING!)
-            if isinstance(value, (bool, np.bool_)):
-                return bool(value)
-            # Handle numpy numbers
-            if isinstance(value, (np.floating, np.integer)):
-                return float(value)
-            # Handle numpy strings
-            if isinstance(value, np.str_):
-                return str(value)
-            return value
-        
-        # Generate all charts
-        charts = {}
-        
-        # ========== CORE ANALYTICS CHARTS (Always show) ==========
-        
-        # 1. Fruit distribution
-        fruit_counts = df['Fruit_Type'].value_counts()
-        fig_fruit = px.pie(values=fruit_counts.values, names=fruit_counts.index,
-                          title="Fruit Type Distribution")
-        charts['fruitDistribution'] = json.loads(json.dumps(fig_fruit, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # 2. Ripeness distribution
-        ripeness_counts = df['Ripeness'].value_counts()
-        color_map = {'Unripe': '#90EE90', 'Ripe': '#FFD700', 'Overripe': '#FF6347', 'Not Fruit': '#808080'}
-        fig_ripeness = px.pie(values=ripeness_counts.values, names=ripeness_counts.index,
-                             title="Ripeness Distribution",
-                             color_discrete_map=color_map)
-        charts['ripenessDistribution'] = json.loads(json.dumps(fig_ripeness, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # 3. Confidence scatter
-        fig_scatter = px.scatter(df, x='Fruit_Confidence', y='Ripeness_Confidence',
-                                color='Ripeness', size='Fruit_Confidence',
-                                hover_data=['Fruit_Type', 'Source'],
-                                title="Fruit vs Ripeness Confidence",
-                                color_discrete_map=color_map)
-        charts['confidenceScatter'] = json.loads(json.dumps(fig_scatter, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # 4. Source distribution
+        # Aggregated chart data; figures are built client-side from shared templates
+        charts = build_chart_specs(df, df_iot)
         source_counts = df['Source'].value_counts()
-        fig_source = px.pie(values=source_counts.values, names=source_counts.index,
-                           hole=0.5, title="Data Source Breakdown")
-        charts['sourceDistribution'] = json.loads(json.dumps(fig_source, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # 5. Stacked bar
-        fruit_ripeness = df.groupby(['Fruit_Type', 'Ripeness']).size().reset_index(name='Count')
-        fig_stacked = px.bar(fruit_ripeness, x='Fruit_Type', y='Count', color='Ripeness',
-                            title="Fruit Type by Ripeness Level", barmode='stack',
-                            color_discrete_map=color_map)
-        charts['stackedBar'] = json.loads(json.dumps(fig_stacked, cls=plotly.utils.PlotlyJSONEncoder))
         
-        # 6. Grouped bar
-        fig_grouped = px.bar(fruit_ripeness, x='Fruit_Type', y='Count', color='Ripeness',
-                            title="Fruit Type by Ripeness (Grouped)", barmode='group',
-                            color_discrete_map=color_map)
-        charts['groupedBar'] = json.loads(json.dumps(fig_grouped, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # 7. Box plots
-        fig_box_fruit = px.box(df, x='Fruit_Type', y='Fruit_Confidence',
-                              title="Fruit Confidence Distribution",
-                              color='Fruit_Type', points="all")
-        charts['fruitConfBox'] = json.loads(json.dumps(fig_box_fruit, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        fig_box_ripeness = px.box(df, x='Ripeness', y='Ripeness_Confidence',
-                                 title="Ripeness Confidence Distribution",
-                                 color='Ripeness', points="all",
-                                 color_discrete_map=color_map)
-        charts['ripenessConfBox'] = json.loads(json.dumps(fig_box_ripeness, cls=plotly.utils.PlotlyJSONEncoder))
-        
-        # ========== ENVIRONMENTAL CHARTS (Only if IoT data exists) ==========
         if len(df_iot) > 0:
-            # 1. Temperature & Humidity combined timeline
-            fig_combined = make_subplots(
-                rows=2, cols=1,
-                subplot_titles=("Temperature (°C)", "Humidity (%)"),
-                vertical_spacing=0.12,
-                shared_xaxes=True
-            )
-            
-            fig_combined.add_trace(
-                go.Scatter(x=df_iot['Timestamp'], y=df_iot['Temperature_C'],
-                          mode='lines+markers', name='Temperature',
-                          line=dict(color='#FF6347', width=2), marker=dict(size=8)),
-                row=1, col=1
-            )
-            
-            fig_combined.add_trace(
-                go.Scatter(x=df_iot['Timestamp'], y=df_iot['Humidity_pct'],
-                          mode='lines+markers', name='Humidity',
-                          line=dict(color='#4682B4', width=2), marker=dict(size=8)),
-                row=2, col=1
-            )
-            
-            fig_combined.update_layout(height=600, showlegend=False)
-            charts['tempHumCombined'] = json.loads(json.dumps(fig_combined, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 2. Temperature Distribution
-            fig_temp_hist = px.histogram(df_iot, x='Temperature_C', nbins=20,
-                                         title="Temperature Distribution",
-                                         color_discrete_sequence=['#FF6347'])
-            fig_temp_hist.update_layout(xaxis_title="Temperature (°C)", yaxis_title="Frequency")
-            charts['tempDistribution'] = json.loads(json.dumps(fig_temp_hist, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 3. Humidity Distribution
-            fig_hum_hist = px.histogram(df_iot, x='Humidity_pct', nbins=20,
-                                       title="Humidity Distribution",
-                                       color_discrete_sequence=['#4682B4'])
-            fig_hum_hist.update_layout(xaxis_title="Humidity (%)", yaxis_title="Frequency")
-            charts['humDistribution'] = json.loads(json.dumps(fig_hum_hist, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 4. Temperature vs Humidity Correlation
-            fig_correlation = px.scatter(df_iot, x='Temperature_C', y='Humidity_pct',
-                                        color='Ripeness', size='Fruit_Confidence',
-                                        hover_data=['Fruit_Type', 'Timestamp'],
-                                        title="Temperature vs Humidity by Ripeness",
-                                        color_discrete_map=color_map)
-            charts['tempHumCorrelation'] = json.loads(json.dumps(fig_correlation, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 5. Box plots by category
-            fig_temp_fruit = px.box(df_iot, x='Fruit_Type', y='Temperature_C',
-                                   color='Fruit_Type', title="Temperature by Fruit Type", points="all")
-            charts['tempByFruit'] = json.loads(json.dumps(fig_temp_fruit, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            fig_temp_ripeness = px.box(df_iot, x='Ripeness', y='Temperature_C',
-                                       color='Ripeness', title="Temperature by Ripeness",
-                                       color_discrete_map=color_map, points="all")
-            charts['tempByRipeness'] = json.loads(json.dumps(fig_temp_ripeness, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            fig_hum_fruit = px.box(df_iot, x='Fruit_Type', y='Humidity_pct',
-                                  color='Fruit_Type', title="Humidity by Fruit Type", points="all")
-            charts['humByFruit'] = json.loads(json.dumps(fig_hum_fruit, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            fig_hum_ripeness = px.box(df_iot, x='Ripeness', y='Humidity_pct',
-                                     color='Ripeness', title="Humidity by Ripeness",
-                                     color_discrete_map=color_map, points="all")
-            charts['humByRipeness'] = json.loads(json.dumps(fig_hum_ripeness, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 6. Heatmaps
-            temp_pivot = df_iot.pivot_table(values='Temperature_C', index='Ripeness',
-                                           columns='Fruit_Type', aggfunc='mean')
-            fig_heat_temp = px.imshow(temp_pivot, text_auto='.1f',
-                                     title="Average Temperature by Category",
-                                     color_continuous_scale='Reds',
-                                     labels=dict(color="Temp (°C)"))
-            charts['tempHeatmap'] = json.loads(json.dumps(fig_heat_temp, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            hum_pivot = df_iot.pivot_table(values='Humidity_pct', index='Ripeness',
-                                          columns='Fruit_Type', aggfunc='mean')
-            fig_heat_hum = px.imshow(hum_pivot, text_auto='.1f',
-                                    title="Average Humidity by Category",
-                                    color_continuous_scale='Blues',
-                                    labels=dict(color="Humidity (%)"))
-            charts['humHeatmap'] = json.loads(json.dumps(fig_heat_hum, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            # 7. Gauges
             avg_temp = df_iot['Temperature_C'].mean()
             avg_hum = df_iot['Humidity_pct'].mean()
             
-            fig_gauge_temp = go.Figure(go.Indicator(
-                mode="gauge+number", value=avg_temp,
-                title={'text': "Average Temperature"},
-                gauge={'axis': {'range': [0, 40]},
-                      'bar': {'color': "#FF6347"},
-                      'steps': [
-                          {'range': [0, 10], 'color': "#ADD8E6"},
-                          {'range': [10, 20], 'color': "#90EE90"},
-                          {'range': [20, 30], 'color': "#FFD700"},
-                          {'range': [30, 40], 'color': "#FF6347"}
-                      ]}
-            ))
-            fig_gauge_temp.update_layout(height=300)
-            charts['tempGauge'] = json.loads(json.dumps(fig_gauge_temp, cls=plotly.utils.PlotlyJSONEncoder))
-            
-            fig_gauge_hum = go.Figure(go.Indicator(
-                mode="gauge+number", value=avg_hum,
-                title={'text': "Average Humidity"},
-                gauge={'axis': {'range': [0, 100]},
-                      'bar': {'color': "#4682B4"},
-                      'steps': [
-                          {'range': [0, 30], 'color': "#FFE4B5"},
-                          {'range': [30, 50], 'color': "#ADD8E6"},
-                          {'range': [50, 70], 'color': "#90EE90"},
-                          {'range': [70, 100], 'color': "#4682B4"}
-                      ]}
-            ))
-            fig_gauge_hum.update_layout(height=300)
-            charts['humGauge'] = json.loads(json.dumps(fig_gauge_hum, cls=plotly.utils.PlotlyJSONEncoder))
-            
             # Environmental stats
             charts['stats'] = {
                 'minTemp': round(df_iot['Temperature_C'].min(), 1),
@@ -411,17 +427,17 @@ def dashboard_data():
                 'acceptable': bool(15 <= avg_temp <= 30 and 40 <= avg_hum <= 80),  # ✅ Convert to bool
             }
         
-        # ========== METRICS (Clean NaN values) ==========
+        # ========== METRICS (NaN is encoded as null) ==========
         avg_temp = df['Temperature_C'].dropna().mean()
         avg_hum = df['Humidity_pct'].dropna().mean()
         
         metrics = {
             'total_analyses': int(len(df)),
-            'avg_fruit_conf': clean_for_json(df['Fruit_Confidence'].mean()),
-            'avg_ripeness_conf': clean_for_json(df['Ripeness_Confidence'].mean()),
+            'avg_fruit_conf': df['Fruit_Confidence'].mean(),
+            'avg_ripeness_conf': df['Ripeness_Confidence'].mean(),
             'most_common_fruit': str(df['Fruit_Type'].mode()[0]) if len(df) > 0 else 'N/A',
-            'avg_temp': clean_for_json(avg_temp),
-            'avg_humidity': clean_for_json(avg_hum)
+            'avg_temp': avg_temp,
+            'avg_humidity': avg_hum
         }
         
         # ========== INSIGHTS ==========
@@ -440,21 +456,22 @@ def dashboard_data():
         if len(source_counts) > 0:
             insights.append(f"Most used source: **{source_counts.index[0]}**")
         
-        # ✅ Clean raw data for JSON (Handle ALL types including bool)
-        raw_data_cleaned = []
-        for record in df.to_dict('records'):
-            cleaned_record = {}
-            for key, value in record.items():
-                cleaned_record[key] = clean_for_json(value)
-            raw_data_cleaned.append(cleaned_record)
-        
         print(f"✅ Dashboard generated: {len(charts)} charts, {len(df)} records")
         
-        return jsonify({
+        valid_dates = df['Date'].dropna()
+        filter_options = {
+            'fruits': df['Fruit_Type'].dropna().unique().tolist(),
+            'ripeness': df['Ripeness'].dropna().unique().tolist(),
+            'dateMin': valid_dates.min().strftime("%Y-%m-%d") if len(valid_dates) else None,
+            'dateMax': valid_dates.max().strftime("%Y-%m-%d") if len(valid_dates) else None
+        }
+        
+        return json_response({
+            'schemaVersion': CHART_SCHEMA_VERSION,
             'charts': charts,
             'metrics': metrics,
             'insights': insights,
-            'rawData': raw_data_cleaned
+            'filterOptions': filter_options
         })
         
     except Exception as e:
@@ -470,28 +487,7 @@ def dashboard_data():
 def history_data():
     try:
         df = pd.read_csv(CSV_FILE)
-        
-        # ✅ Clean NaN values for JSON serialization
-        def clean_for_json(value):
-            if pd.isna(value) or (isinstance(value, float) and value != value):  # Check for NaN
-                return None
-            if isinstance(value, (np.floating, np.integer)):
-                return float(value)
-            if isinstance(value, np.bool_):
-                return bool(value)
-            return value
-        
-        # Convert to dict and clean all values
-        records = df.to_dict('records')
-        cleaned_records = []
-        
-        for record in records:
-            cleaned_record = {}
-            for key, value in record.items():
-                cleaned_record[key] = clean_for_json(value)
-            cleaned_records.append(cleaned_record)
-        
-        return jsonify(cleaned_records)
+        return json_response(records(df))
         
     except Exception as e:
         print(f"❌ History error: {str(e)}")
@@ -504,9 +500,44 @@ def history_data():
 
 @app.route('/download_csv', methods=['GET'])
 def download_csv():
-    return send_file(CSV_FILE, as_attachment=True, 
+    return send_file(CSV_FILE, as_attachment=True, conditional=True,
                      download_name=f'fruit_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
 
+@app.route('/export', methods=['GET'])
+def export():
+    fmt = request.args.get('format', 'csv')
+    compression = request.args.get('compression')
+    
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        return jsonify({'error': 'pyarrow not installed'}), 500
+    if compression not in (None, 'gzip'):
+        return jsonify({'error': f'Unknown compression: {compression}'}), 400
+    
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    if compression == 'gzip':
+        mimetype, ext = 'application/gzip', f'{ext}.gz'
+    download_name = f'fruit_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{ext}'
+    
+    # Resumed downloads are served from a cached copy so byte offsets stay valid
+    if request.range is not None:
+        path, etag = materialize_export(CSV_FILE, filters, fmt, compression)
+        return send_file(path, mimetype=mimetype, as_attachment=True,
+                         download_name=download_name, etag=etag, conditional=True)
+    
+    response = Response(stream_with_context(generate_export(CSV_FILE, filters, fmt, compression)),
+                        mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.set_etag(export_etag(CSV_FILE, filters, fmt, compression))
+    return response
+
 # ==================== RUN ==================== #
 
 if __name__ == "__main__":
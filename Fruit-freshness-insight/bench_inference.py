@@ -0,0 +1,42 @@
+# bench_inference.py - Latency of model.predict vs the compiled tf.function path
+# Usage: python bench_inference.py [repeats]
+# Respects INFERENCE_XLA / TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS like the backend.
+import sys
+import time
+
+import numpy as np
+
+from app import model, _compiled_infer, INFERENCE_XLA, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+
+
+def median_ms(fn, batch, repeats):
+    fn(batch)   # warm up / trace / compile
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = np.random.default_rng(0)
+
+    predict = lambda b: model.predict(b, verbose=0)
+    compiled = lambda b: [o.numpy() for o in _compiled_infer(b)]
+
+    print(f"xla={INFERENCE_XLA} intra_op={TF_INTRA_OP_THREADS or 'auto'} "
+          f"inter_op={TF_INTER_OP_THREADS or 'auto'} repeats={repeats}")
+    print(f"{'batch':>5} {'predict ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        batch = rng.uniform(-1, 1, (size, 224, 224, 3)).astype('float32')
+        predict_ms = median_ms(predict, batch, repeats)
+        compiled_ms = median_ms(compiled, batch, repeats)
+        print(f"{size:>5} {predict_ms:>11.1f} {compiled_ms:>12.1f} {predict_ms / compiled_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
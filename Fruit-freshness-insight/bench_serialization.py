@@ -0,0 +1,103 @@
+# bench_serialization.py - Compare the old and new JSON paths on dashboard/history-sized payloads
+# (dashboard: full plotly figures + raw rows vs. compact chart specs)
+# Usage: python bench_serialization.py [rows]
+import gzip
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.utils
+
+from chart_specs import build_chart_specs
+from serialization import dumps, records, ORJSON_AVAILABLE, BROTLI_AVAILABLE, BROTLI_QUALITY
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+
+def make_results(rows):
+    rng = np.random.default_rng(0)
+    stamps = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit='s')
+    has_env = rng.random(rows) < 0.6
+    return pd.DataFrame({
+        'ID': np.arange(1, rows + 1),
+        'Timestamp': stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        'Date': stamps.strftime("%Y-%m-%d"),
+        'Time': stamps.strftime("%H:%M:%S"),
+        'Source': np.where(has_env, 'Combined(IoT)', 'Camera/Upload'),
+        'Is_Fruit': rng.random(rows) < 0.95,
+        'Fruit_Type': rng.choice(['Apple', 'Orange', 'N/A'], rows),
+        'Fruit_Confidence': rng.uniform(40, 100, rows).round(2),
+        'Ripeness': rng.choice(['Unripe', 'Ripe', 'Overripe', 'Not Fruit'], rows),
+        'Ripeness_Confidence': rng.uniform(40, 100, rows).round(2),
+        'Temperature_C': np.where(has_env, rng.uniform(10, 35, rows).round(1), np.nan),
+        'Humidity_pct': np.where(has_env, rng.uniform(30, 90, rows).round(1), np.nan),
+        'Shelf_Life': np.where(has_env, '2-3 days', None),
+    })
+
+
+def legacy_clean(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (np.floating, np.integer)):
+        return float(value)
+    return value
+
+
+def legacy_dumps(df, figures):
+    charts = {name: json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+              for name, fig in figures.items()}
+    raw = [{k: legacy_clean(v) for k, v in record.items()} for record in df.to_dict('records')]
+    return json.dumps({'charts': charts, 'rawData': raw}).encode('utf-8')
+
+
+def new_dumps(df, figures):
+    return dumps({'charts': figures, 'rawData': records(df)})
+
+
+def spec_dumps(df):
+    df_iot = df[df['Temperature_C'].notna() & df['Humidity_pct'].notna()]
+    return dumps({'charts': build_chart_specs(df, df_iot)})
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, out
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    df = make_results(rows)
+    figures = {
+        'fruitDistribution': px.pie(df, names='Fruit_Type'),
+        'confidenceScatter': px.scatter(df, x='Fruit_Confidence', y='Ripeness_Confidence', color='Ripeness'),
+        'fruitConfBox': px.box(df, x='Fruit_Type', y='Fruit_Confidence', color='Fruit_Type', points='all'),
+    }
+
+    print(f"rows={rows} orjson={ORJSON_AVAILABLE} brotli={BROTLI_AVAILABLE}")
+    for name, old, new in [
+        ('/dashboard_data', lambda: legacy_dumps(df, figures), lambda: spec_dumps(df)),
+        ('/history_data', lambda: legacy_dumps(df, {}), lambda: new_dumps(df, {})),
+    ]:
+        old_ms, old_body = timed(old)
+        new_ms, new_body = timed(new)
+        gz_ms, gz_body = timed(lambda: gzip.compress(new_body, 6))
+        print(f"{name}: legacy {old_ms:.1f} ms, new {new_ms:.1f} ms ({old_ms / new_ms:.1f}x)")
+        print(f"  size {len(old_body) / 1024:.0f} KB -> {len(new_body) / 1024:.0f} KB, "
+              f"gzip {len(gz_body) / 1024:.0f} KB in {gz_ms:.1f} ms")
+        if BROTLI_AVAILABLE:
+            br_ms, br_body = timed(lambda: brotli.compress(new_body, quality=BROTLI_QUALITY))
+            print(f"  brotli {len(br_body) / 1024:.0f} KB in {br_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
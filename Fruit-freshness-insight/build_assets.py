@@ -0,0 +1,221 @@
+# build_assets.py - Build optimized frontend assets into frontend/build
+# Usage: python build_assets.py
+#
+# - referenced PNG/JPG images -> resized WebP (+ AVIF when pillow-avif-plugin is installed)
+# - CSS/JS -> content-hashed copies with precompressed .gz (+ .br with Brotli)
+# - HTML pages rewritten to point at the hashed files under assets/
+# Prints page weight and an estimated render-blocking transfer time before/after.
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+
+from PIL import Image
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Importing the plugin registers the AVIF encoder with Pillow
+try:
+    import pillow_avif  # noqa: F401
+    AVIF_AVAILABLE = True
+except ImportError:
+    AVIF_AVAILABLE = False
+
+from assets import FRONTEND_DIR, BUILD_DIR, ASSET_DIR, MANIFEST_FILE
+
+MAX_IMAGE_SIDE = 1920       # backgrounds are shown full-screen at most
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+HASH_LENGTH = 10
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+TEXT_EXTENSIONS = ('.css', '.js')
+
+# Report assumptions for the time-to-first-render estimate
+REPORT_BANDWIDTH_BPS = 10_000_000 / 8    # 10 Mbit/s
+REPORT_RTT_S = 0.05
+
+REF_PATTERNS = [
+    re.compile(r'''(?:src|href)=["']([^"':]+)["']'''),
+    re.compile(r'''url\(\s*["']?([^"')]+?)["']?\s*\)'''),
+]
+
+
+def find_refs(text):
+    """Local file names referenced from HTML/CSS/JS text."""
+    refs = set()
+    for pattern in REF_PATTERNS:
+        for ref in pattern.findall(text):
+            if not ref.endswith('.html') and os.path.isfile(os.path.join(FRONTEND_DIR, ref)):
+                refs.add(ref)
+    return refs
+
+
+def rewrite_refs(text, mapping, prefix=''):
+    def replace(match):
+        ref = match.group(1)
+        if ref not in mapping:
+            return match.group(0)
+        return match.group(0).replace(ref, prefix + mapping[ref])
+    for pattern in REF_PATTERNS:
+        text = pattern.sub(replace, text)
+    return text
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(ref, digest, ext=None):
+    stem, orig_ext = os.path.splitext(os.path.basename(ref))
+    return f"{stem}.{digest}{ext or orig_ext}"
+
+
+# ==================== BUILD STEPS ==================== #
+
+def encode_image(img, fmt, **params):
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def build_image(ref):
+    """Resize once and write WebP (and AVIF). Returns the WebP file name.
+
+    Both files share one hash of their encoded bytes, so a change in the
+    resize or encoder settings gets new names, and serve_asset can find the
+    AVIF sibling of a WebP by swapping the extension.
+    """
+    img = Image.open(os.path.join(FRONTEND_DIR, ref))
+    img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+
+    encoded = {'.webp': encode_image(img, 'WEBP', quality=WEBP_QUALITY, method=6)}
+    if AVIF_AVAILABLE:
+        encoded['.avif'] = encode_image(img, 'AVIF', quality=AVIF_QUALITY)
+    digest = content_hash(b''.join(encoded.values()))
+
+    for ext, data in encoded.items():
+        with open(os.path.join(ASSET_DIR, hashed_name(ref, digest, ext)), 'wb') as f:
+            f.write(data)
+    return hashed_name(ref, digest, '.webp')
+
+
+def write_precompressed(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if BROTLI_AVAILABLE:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build_text(ref, mapping):
+    """Rewrite references, hash the final content and write it with .gz/.br siblings."""
+    with open(os.path.join(FRONTEND_DIR, ref), encoding='utf-8') as f:
+        text = f.read()
+    # CSS and JS live next to the images in assets/, so no prefix is needed
+    data = rewrite_refs(text, mapping).encode('utf-8')
+    name = hashed_name(ref, content_hash(data))
+    write_precompressed(os.path.join(ASSET_DIR, name), data)
+    return name
+
+
+def build():
+    if os.path.isdir(BUILD_DIR):
+        shutil.rmtree(BUILD_DIR)
+    os.makedirs(ASSET_DIR)
+
+    pages = sorted(name for name in os.listdir(FRONTEND_DIR) if name.endswith('.html'))
+    page_refs, texts = {}, {}
+    for page in pages:
+        with open(os.path.join(FRONTEND_DIR, page), encoding='utf-8') as f:
+            texts[page] = f.read()
+        page_refs[page] = find_refs(texts[page])
+
+    all_refs = set().union(*page_refs.values())
+    # Images referenced from CSS/JS belong to the page too
+    for ref in [r for r in all_refs if r.endswith(TEXT_EXTENSIONS)]:
+        with open(os.path.join(FRONTEND_DIR, ref), encoding='utf-8') as f:
+            nested = find_refs(f.read())
+        all_refs |= nested
+        for page, refs in page_refs.items():
+            if ref in refs:
+                refs |= nested
+
+    mapping = {}
+    for ref in sorted(r for r in all_refs if r.lower().endswith(IMAGE_EXTENSIONS)):
+        mapping[ref] = build_image(ref)
+    for ref in sorted(r for r in all_refs if r.endswith(TEXT_EXTENSIONS)):
+        mapping[ref] = build_text(ref, mapping)
+
+    for page in pages:
+        with open(os.path.join(BUILD_DIR, page), 'w', encoding='utf-8') as f:
+            f.write(rewrite_refs(texts[page], mapping, prefix='assets/'))
+
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(mapping, f, indent=2, sort_keys=True)
+
+    report(pages, page_refs, texts, mapping)
+
+
+# ==================== REPORT ==================== #
+
+def _size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _built_size(name):
+    """Bytes actually sent for a built asset: best precompressed variant for text."""
+    path = os.path.join(ASSET_DIR, name)
+    if name.endswith(TEXT_EXTENSIONS):
+        variants = [v for v in (_size(path + '.br'), _size(path + '.gz')) if v]
+        return min(variants) if variants else _size(path)
+    return _size(path)
+
+
+def _render_time(blocking_bytes, blocking_requests):
+    return blocking_bytes / REPORT_BANDWIDTH_BPS + blocking_requests * REPORT_RTT_S
+
+
+def _background_refs(page_text, refs):
+    """Images pulled in through url(), inline or from the page's stylesheets."""
+    backgrounds = set(REF_PATTERNS[1].findall(page_text))
+    for ref in refs:
+        if ref.endswith('.css'):
+            with open(os.path.join(FRONTEND_DIR, ref), encoding='utf-8') as f:
+                backgrounds |= set(REF_PATTERNS[1].findall(f.read()))
+    return [r for r in backgrounds if r in refs]
+
+
+def report(pages, page_refs, texts, mapping):
+    print(f"{'page':<16} {'weight before':>14} {'after':>10} {'est. first render before':>25} {'after':>8}")
+    for page in pages:
+        html_size = _size(os.path.join(FRONTEND_DIR, page))
+        refs = page_refs[page]
+        before = html_size + sum(_size(os.path.join(FRONTEND_DIR, r)) for r in refs)
+        after = html_size + sum(_built_size(mapping[r]) for r in refs)
+
+        # First render needs the HTML, its stylesheets and the full-bleed
+        # background images (scripts sit at the end of <body>)
+        critical = [r for r in refs if r.endswith('.css')] + _background_refs(texts[page], refs)
+        critical_before = html_size + sum(_size(os.path.join(FRONTEND_DIR, r)) for r in critical)
+        critical_after = html_size + sum(_built_size(mapping[r]) for r in critical)
+
+        print(f"{page:<16} {before / 1024:>11.0f} KB {after / 1024:>7.0f} KB "
+              f"{_render_time(critical_before, 1 + len(critical)) * 1000:>22.0f} ms "
+              f"{_render_time(critical_after, 1 + len(critical)) * 1000:>5.0f} ms")
+    print(f"(first render = HTML + CSS + background images, estimated at "
+          f"{REPORT_BANDWIDTH_BPS * 8 / 1e6:.0f} Mbit/s and {REPORT_RTT_S * 1000:.0f} ms per request "
+          f"with a cold cache; repeat visits skip all hashed assets thanks to immutable caching)")
+
+
+if __name__ == "__main__":
+    build()
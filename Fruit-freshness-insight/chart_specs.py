@@ -0,0 +1,122 @@
+# chart_specs.py - Compact aggregated chart data for the dashboard
+#
+# The dashboard builds its plotly figures client-side (frontend/dashboard.js)
+# from shared templates; the server only sends the aggregated series below.
+# Bump CHART_SCHEMA_VERSION whenever a spec's shape changes.
+import numpy as np
+import pandas as pd
+
+CHART_SCHEMA_VERSION = 1
+HIST_BINS = 20
+
+
+def _list(values, decimals=2):
+    """Rounded floats as a plain list with NaN -> None."""
+    arr = np.round(np.asarray(values, dtype='float64'), decimals)
+    return [None if np.isnan(v) else float(v) for v in arr]
+
+
+def counts(series):
+    vc = series.value_counts()
+    return {'labels': vc.index.astype(str).tolist(), 'values': vc.values.tolist()}
+
+
+def count_matrix(df, x_col, series_col):
+    """Counts per (x, series) pair, e.g. fruit type by ripeness."""
+    pivot = pd.crosstab(df[series_col], df[x_col])
+    return {
+        'x': pivot.columns.astype(str).tolist(),
+        'series': pivot.index.astype(str).tolist(),
+        'z': pivot.values.tolist(),
+    }
+
+
+def mean_matrix(df, value_col, row_col, col_col):
+    pivot = df.pivot_table(values=value_col, index=row_col, columns=col_col, aggfunc='mean')
+    return {
+        'x': pivot.columns.astype(str).tolist(),
+        'y': pivot.index.astype(str).tolist(),
+        'z': [_list(row, 1) for row in pivot.values],
+    }
+
+
+def box_stats(df, group_col, value_col):
+    """Per-group quartiles and Tukey fences, enough for a precomputed plotly box."""
+    groups, q1, median, q3, lower, upper, mean, n = [], [], [], [], [], [], [], []
+    for name, values in df.groupby(group_col)[value_col]:
+        values = values.dropna().to_numpy()
+        if len(values) == 0:
+            continue
+        a, m, b = np.percentile(values, [25, 50, 75])
+        iqr = b - a
+        groups.append(str(name))
+        q1.append(a)
+        median.append(m)
+        q3.append(b)
+        # Whiskers end at the furthest points inside 1.5 IQR, like plotly's default
+        lower.append(values[values >= a - 1.5 * iqr].min())
+        upper.append(values[values <= b + 1.5 * iqr].max())
+        mean.append(values.mean())
+        n.append(int(len(values)))
+    return {
+        'groups': groups,
+        'q1': _list(q1), 'median': _list(median), 'q3': _list(q3),
+        'lowerfence': _list(lower), 'upperfence': _list(upper),
+        'mean': _list(mean), 'n': n,
+    }
+
+
+def histogram(values, bins=HIST_BINS):
+    values = values.dropna().to_numpy()
+    hist, edges = np.histogram(values, bins=bins)
+    return {'edges': _list(edges), 'counts': hist.tolist()}
+
+
+def scatter_groups(df, group_col, x_col, y_col, size_col):
+    """Columnar points per group (one plotly trace each).
+
+    ``size`` is left out when it is the x column; the client reuses x.
+    """
+    groups = {}
+    for name, g in df.groupby(group_col):
+        group = {'x': _list(g[x_col]), 'y': _list(g[y_col])}
+        if size_col != x_col:
+            group['size'] = _list(g[size_col], 1)
+        groups[str(name)] = group
+    return groups
+
+
+def build_chart_specs(df, df_iot):
+    """All dashboard chart data, keyed by chart id."""
+    charts = {
+        'fruitDistribution': counts(df['Fruit_Type']),
+        'ripenessDistribution': counts(df['Ripeness']),
+        'sourceDistribution': counts(df['Source']),
+        'confidenceScatter': scatter_groups(df, 'Ripeness', 'Fruit_Confidence',
+                                            'Ripeness_Confidence', 'Fruit_Confidence'),
+        # Shared by the stacked and grouped bar charts
+        'fruitRipeness': count_matrix(df, 'Fruit_Type', 'Ripeness'),
+        'fruitConfBox': box_stats(df, 'Fruit_Type', 'Fruit_Confidence'),
+        'ripenessConfBox': box_stats(df, 'Ripeness', 'Ripeness_Confidence'),
+    }
+
+    if len(df_iot) > 0:
+        charts.update({
+            'tempHumTimeline': {
+                'x': df_iot['Timestamp'].astype(str).tolist(),
+                'temperature': _list(df_iot['Temperature_C'], 1),
+                'humidity': _list(df_iot['Humidity_pct'], 1),
+            },
+            'tempDistribution': histogram(df_iot['Temperature_C']),
+            'humDistribution': histogram(df_iot['Humidity_pct']),
+            'tempHumCorrelation': scatter_groups(df_iot, 'Ripeness', 'Temperature_C',
+                                                 'Humidity_pct', 'Fruit_Confidence'),
+            'tempByFruit': box_stats(df_iot, 'Fruit_Type', 'Temperature_C'),
+            'tempByRipeness': box_stats(df_iot, 'Ripeness', 'Temperature_C'),
+            'humByFruit': box_stats(df_iot, 'Fruit_Type', 'Humidity_pct'),
+            'humByRipeness': box_stats(df_iot, 'Ripeness', 'Humidity_pct'),
+            'tempHeatmap': mean_matrix(df_iot, 'Temperature_C', 'Ripeness', 'Fruit_Type'),
+            'humHeatmap': mean_matrix(df_iot, 'Humidity_pct', 'Ripeness', 'Fruit_Type'),
+        })
+
+    return charts
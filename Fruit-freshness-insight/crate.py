@@ -0,0 +1,117 @@
+# crate.py - Multi-fruit crate images via tiled, batched crop inference
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from app import get_predictions
+
+# Tiling defaults (overridable per request)
+GRID_ROWS = 4
+GRID_COLS = 4
+MIN_SATURATION = 40        # mean HSV saturation (0-255) below which a tile is background
+MAX_TILES = 256            # per image; each tile becomes a 224x224x3 float32 model input
+BATCH_SIZE = 32            # tiles per model call
+BG_FILTERS = ('color', 'none')
+
+
+def _require_positive(**values):
+    for name, value in values.items():
+        if value < 1:
+            raise ValueError(f"{name} must be at least 1, got {value}")
+
+
+def _require_tile_limit(count):
+    if count > MAX_TILES:
+        raise ValueError(f"Tiling would produce {count} tiles; the limit is {MAX_TILES}")
+
+
+def grid_boxes(width, height, rows=GRID_ROWS, cols=GRID_COLS):
+    """(left, top, right, bottom) boxes splitting the image into a rows x cols grid."""
+    _require_positive(rows=rows, cols=cols)
+    _require_tile_limit(rows * cols)
+    xs = np.linspace(0, width, cols + 1).astype(int)
+    ys = np.linspace(0, height, rows + 1).astype(int)
+    return [(xs[c], ys[r], xs[c + 1], ys[r + 1]) for r in range(rows) for c in range(cols)]
+
+
+def window_boxes(width, height, tile_size, stride):
+    """Square sliding-window boxes; the last row/column is shifted to touch the edge."""
+    _require_positive(tile_size=tile_size, stride=stride)
+    tile_size = min(tile_size, width, height)
+
+    def starts(length):
+        last = length - tile_size
+        positions = range(0, last + 1, stride)
+        return list(positions) if positions[-1] == last else [*positions, last]
+
+    # Count before building the box list: a tiny stride on a large photo is millions of boxes
+    def count(length):
+        last = length - tile_size
+        return last // stride + 1 + (last % stride != 0)
+
+    _require_tile_limit(count(width) * count(height))
+    return [(x, y, x + tile_size, y + tile_size) for y in starts(height) for x in starts(width)]
+
+
+def is_background(tile_rgb, min_saturation=MIN_SATURATION):
+    """Cheap color heuristic: crate slats, belts and shadows are far less saturated than fruit."""
+    small = cv2.resize(tile_rgb, (32, 32), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)
+    return hsv[:, :, 1].mean() < min_saturation
+
+
+def summarize(tiles):
+    """Crate-level counts and confidences from the per-tile results."""
+    fruit_tiles = [t for t in tiles if t.get('is_fruit')]
+    return {
+        'fruit_count': len(fruit_tiles),
+        'fruits': dict(Counter(t['fruit'] for t in fruit_tiles)),
+        'ripeness': dict(Counter(t['ripeness'] for t in fruit_tiles)),
+        'avg_fruit_conf': float(np.mean([t['fruit_conf'] for t in fruit_tiles])) if fruit_tiles else None,
+        'avg_ripeness_conf': float(np.mean([t['ripeness_conf'] for t in fruit_tiles])) if fruit_tiles else None,
+    }
+
+
+def predict_crate(image_pil, rows=GRID_ROWS, cols=GRID_COLS, tile_size=None, stride=None,
+                  bg_filter='color', min_saturation=MIN_SATURATION):
+    """Tile the image, drop background tiles and classify the rest in one batch.
+
+    Uses a rows x cols grid unless ``tile_size`` is given, in which case
+    sliding windows of that size with ``stride`` (default: half a tile)
+    are used. Tiles the model calls 'Not Fruit' stay in the per-tile output
+    but are not counted in the summary. Returns (tiles, summary).
+    """
+    if bg_filter not in BG_FILTERS:
+        raise ValueError(f"Unknown bg_filter: {bg_filter}")
+
+    img = np.array(image_pil.convert('RGB'))
+    height, width = img.shape[:2]
+    if tile_size is not None:
+        boxes = window_boxes(width, height, tile_size, stride if stride is not None else max(1, tile_size // 2))
+    else:
+        boxes = grid_boxes(width, height, rows, cols)
+
+    tiles, crops = [], []
+    for box in boxes:
+        left, top, right, bottom = (int(v) for v in box)
+        crop = img[top:bottom, left:right]
+        tile = {'box': [left, top, right, bottom]}
+        if crop.size == 0 or (bg_filter == 'color' and is_background(crop, min_saturation)):
+            tile['skipped'] = True
+        else:
+            crops.append((tile, crop))
+        tiles.append(tile)
+
+    # preprocess_image accepts arrays as well as PIL images; chunked so the
+    # float32 model input stays bounded
+    results = []
+    for i in range(0, len(crops), BATCH_SIZE):
+        results.extend(get_predictions([crop for _, crop in crops[i:i + BATCH_SIZE]]))
+    for (tile, _), result in zip(crops, results):
+        tile.update(result)
+        tile['skipped'] = False
+
+    summary = summarize(tiles)
+    summary.update(tiles_total=len(tiles), tiles_inferred=len(crops))
+    return tiles, summary
@@ -0,0 +1,271 @@
+# export.py - Streaming, filtered and compressed result exports
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+import pandas as pd
+
+# Parquet export needs pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_CACHE_DIR = 'export_cache'
+EXPORT_CACHE_KEEP = 8           # most recently used exports kept for resuming
+EXPORT_CACHE_GRACE = 300        # seconds; exports used this recently are never evicted
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Fixed dtypes so every chunk (and every Parquet row group) has the same schema
+EXPORT_DTYPES = {
+    'ID': 'Int64',
+    'Timestamp': 'string',
+    'Date': 'string',
+    'Time': 'string',
+    'Source': 'string',
+    'Is_Fruit': 'boolean',
+    'Fruit_Type': 'string',
+    'Fruit_Confidence': 'float64',
+    'Ripeness': 'string',
+    'Ripeness_Confidence': 'float64',
+    'Temperature_C': 'float64',
+    'Humidity_pct': 'float64',
+    'Shelf_Life': 'string',
+    'Expiry_Timestamp': 'Int64',
+}
+
+
+# ==================== FILTERS ==================== #
+
+def parse_filters(args):
+    """Read the dashboard filter fields from a request's query args.
+
+    Raises ValueError for an unparseable date so callers can reject the
+    request before any output is streamed.
+    """
+    def value(name):
+        v = args.get(name)
+        return None if v in (None, '', 'all') else v
+
+    def date_value(name):
+        v = value(name)
+        if v is None:
+            return None
+        try:
+            ts = pd.Timestamp(v)
+        except (ValueError, TypeError):
+            ts = pd.NaT
+        if pd.isna(ts):
+            raise ValueError(f"Invalid {name}: {v}")
+        return ts.isoformat()
+
+    return {
+        'fruit': value('fruit'),
+        'ripeness': value('ripeness'),
+        'source': value('source'),
+        'date_from': date_value('date_from'),
+        'date_to': date_value('date_to'),
+    }
+
+
+def apply_filters(df, filters):
+    """Same semantics as the dashboard filters: exact fruit/ripeness/source, inclusive date range."""
+    mask = pd.Series(True, index=df.index)
+    if filters.get('fruit'):
+        mask &= df['Fruit_Type'] == filters['fruit']
+    if filters.get('ripeness'):
+        mask &= df['Ripeness'] == filters['ripeness']
+    if filters.get('source'):
+        mask &= df['Source'] == filters['source']
+    if filters.get('date_from') or filters.get('date_to'):
+        dates = pd.to_datetime(df['Date'], errors='coerce')
+        if filters.get('date_from'):
+            mask &= dates >= pd.Timestamp(filters['date_from'])
+        if filters.get('date_to'):
+            mask &= dates <= pd.Timestamp(filters['date_to'])
+    return df[mask.fillna(False).astype(bool)]
+
+
+def iter_filtered_chunks(csv_file, filters, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield filtered DataFrame chunks without loading the whole file."""
+    header = pd.read_csv(csv_file, nrows=0).columns
+    dtypes = {col: EXPORT_DTYPES[col] for col in header if col in EXPORT_DTYPES}
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_rows, dtype=dtypes):
+        chunk = apply_filters(chunk, filters)
+        if len(chunk):
+            yield chunk
+
+
+# ==================== ENCODERS ==================== #
+
+def _csv_bytes(csv_file, filters):
+    first = True
+    for chunk in iter_filtered_chunks(csv_file, filters):
+        yield chunk.to_csv(index=False, header=first).encode('utf-8')
+        first = False
+    if first:
+        # No matching rows: still send the header line
+        yield ','.join(pd.read_csv(csv_file, nrows=0).columns).encode('utf-8') + b'\n'
+
+
+def _ndjson_bytes(csv_file, filters):
+    for chunk in iter_filtered_chunks(csv_file, filters):
+        # to_json turns NaN/NA into null and ends each chunk with a newline
+        yield chunk.to_json(orient='records', lines=True).encode('utf-8')
+
+
+class _DrainBuffer:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    mode = 'wb'
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+        self.closed = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_bytes(csv_file, filters):
+    sink = _DrainBuffer()
+    writer = None
+    for chunk in iter_filtered_chunks(csv_file, filters):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is None:
+        header = pd.read_csv(csv_file, nrows=0, dtype=EXPORT_DTYPES)
+        writer = pq.ParquetWriter(sink, pa.Schema.from_pandas(header, preserve_index=False))
+    writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks):
+    # wbits=31 writes a gzip header with mtime 0, so output is byte-for-byte
+    # reproducible and resumable downloads line up
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def generate_export(csv_file, filters, fmt='csv', compression=None):
+    """Yield the encoded export in chunks; memory use is bounded by EXPORT_CHUNK_ROWS."""
+    if fmt == 'csv':
+        chunks = _csv_bytes(csv_file, filters)
+    elif fmt == 'ndjson':
+        chunks = _ndjson_bytes(csv_file, filters)
+    elif fmt == 'parquet':
+        chunks = _parquet_bytes(csv_file, filters)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    if compression == 'gzip':
+        chunks = _gzip(chunks)
+    return chunks
+
+
+# ==================== RESUMABLE DOWNLOADS ==================== #
+
+def export_etag(csv_file, filters, fmt, compression):
+    """Changes whenever the results file or the export parameters change."""
+    stat = os.stat(csv_file)
+    key = json.dumps([stat.st_mtime_ns, stat.st_size, filters, fmt, compression], sort_keys=True)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def materialize_export(csv_file, filters, fmt, compression):
+    """Write the export to the on-disk cache (streamed, not buffered) and return its path.
+
+    Range requests need a fixed byte sequence to seek into, so resumed
+    downloads are served from this file. The cache keeps the most recently
+    used exports (see _evict_exports).
+    """
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    etag = export_etag(csv_file, filters, fmt, compression)
+    path = os.path.join(EXPORT_CACHE_DIR, f'{etag}.export')
+
+    try:
+        # Cache hit: bump mtime so LRU eviction sees it as in use
+        os.utime(path)
+    except FileNotFoundError:
+        # Unique temp file per writer: parallel Range connections may build the
+        # same export at once, and the output is deterministic, so whichever
+        # os.replace lands last is still correct
+        fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in generate_export(csv_file, filters, fmt, compression):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _evict_exports()
+
+    return path, etag
+
+
+def _evict_exports():
+    """Drop exports beyond the EXPORT_CACHE_KEEP most recently used ones.
+
+    Files used within EXPORT_CACHE_GRACE seconds are skipped, so a path
+    another request is about to hand to send_file is never removed.
+    Concurrent evictions may race on the same file, hence the ignored errors.
+    """
+    entries = []
+    for name in os.listdir(EXPORT_CACHE_DIR):
+        if not name.endswith('.export'):
+            continue
+        file_path = os.path.join(EXPORT_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(file_path), file_path))
+        except FileNotFoundError:
+            continue
+
+    cutoff = time.time() - EXPORT_CACHE_GRACE
+    entries.sort(reverse=True)
+    for mtime, file_path in entries[EXPORT_CACHE_KEEP:]:
+        if mtime >= cutoff:
+            continue
+        try:
+            os.remove(file_path)
+        except (FileNotFoundError, PermissionError):
+            # Gone already, or still open for a download on Windows
+            pass
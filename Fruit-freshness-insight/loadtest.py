@@ -0,0 +1,122 @@
+# loadtest.py - Slow-client load test: does /predict keep its throughput?
+# Usage: python loadtest.py IMAGE [--host 127.0.0.1] [--port 5000] [--slow 200] [--duration 30]
+#        [--slow-path /ingest_stream --slow-field video] [--probe /history_data]
+#
+# Opens --slow connections that trickle a multipart upload a few bytes at a
+# time, and meanwhile measures how many normal /predict calls complete
+# (or GET --probe requests, e.g. a Flask-only route behind the WSGI adapter).
+# Compare `python backend.py` against `uvicorn asgi:app --port 5000`.
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+TRICKLE_BYTES = 64
+TRICKLE_DELAY = 0.5    # seconds between slow-client writes
+
+
+def multipart_body(image_bytes, filename, field='image'):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + image_bytes + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def request_head(host, port, path, content_type, length, method='POST'):
+    return (
+        f'{method} {path} HTTP/1.1\r\n'
+        f'Host: {host}:{port}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {length}\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode()
+
+
+async def post(host, port, path, body, content_type, trickle=False, method='POST'):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request_head(host, port, path, content_type, len(body), method))
+        if trickle:
+            for i in range(0, len(body), TRICKLE_BYTES):
+                writer.write(body[i:i + TRICKLE_BYTES])
+                await writer.drain()
+                await asyncio.sleep(TRICKLE_DELAY)
+        else:
+            writer.write(body)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def slow_client(args, body, content_type, stop):
+    while not stop.is_set():
+        try:
+            await post(args.host, args.port, args.slow_path, body, content_type, trickle=True)
+        except (ConnectionError, OSError):
+            await asyncio.sleep(0.1)
+
+
+async def fast_client(args, body, content_type, stop, latencies, errors):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            if args.probe:
+                status = await post(args.host, args.port, args.probe, b'', content_type, method='GET')
+            else:
+                status = await post(args.host, args.port, '/predict', body, content_type)
+        except (ConnectionError, OSError):
+            errors.append('connection')
+            continue
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+
+
+async def main(args):
+    with open(args.image, 'rb') as f:
+        image_bytes = f.read()
+    body, content_type = multipart_body(image_bytes, os.path.basename(args.image))
+    slow_body, slow_type = multipart_body(image_bytes, os.path.basename(args.image), args.slow_field)
+
+    stop = asyncio.Event()
+    latencies, errors = [], []
+    tasks = [asyncio.create_task(slow_client(args, slow_body, slow_type, stop)) for _ in range(args.slow)]
+    await asyncio.sleep(2)   # let the slow clients connect first
+    tasks += [asyncio.create_task(fast_client(args, body, content_type, stop, latencies, errors))
+              for _ in range(args.fast)]
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"slow clients: {args.slow} on {args.slow_path}, fast clients: {args.fast}, duration: {args.duration}s")
+    print(f"{args.probe or '/predict'} completed: {len(latencies)} ({len(latencies) / args.duration:.1f} req/s), errors: {len(errors)}")
+    if latencies:
+        ms = sorted(l * 1000 for l in latencies)
+        print(f"latency ms: p50 {statistics.median(ms):.0f}, "
+              f"p95 {ms[int(len(ms) * 0.95) - 1]:.0f}, max {ms[-1]:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('image')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--slow', type=int, default=200, help='slow uploading clients')
+    parser.add_argument('--fast', type=int, default=4, help='normal /predict clients')
+    parser.add_argument('--duration', type=int, default=30, help='seconds to measure')
+    parser.add_argument('--slow-path', default='/predict', help='route the slow clients upload to')
+    parser.add_argument('--slow-field', default='image', help="form field of the slow uploads ('video' for /ingest_stream)")
+    parser.add_argument('--probe', help='GET this path from the fast clients instead of POST /predict')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,184 @@
+# profiler.py - Opt-in request profiler with slow-request capture
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, request, jsonify, Response, abort
+
+# Profiler configuration (all off by default)
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '0') == '1'
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', '0'))   # 1-in-N requests, 0 = never sample
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', '500'))       # only keep requests slower than this
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))                # how many slow profiles to keep
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')                         # admin routes: token, or localhost only if unset
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+LOCAL_ADDRS = ('127.0.0.1', '::1')
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY = 'profile'
+PROFILE_TOP_N = 15
+
+_profiles = deque(maxlen=PROFILE_KEEP)
+_profile_ids = itertools.count(1)
+_request_counter = itertools.count(1)
+
+# cProfile can only have one active profiler at a time, so concurrent
+# requests that would also be profiled simply run unprofiled.
+_profile_lock = threading.Lock()
+# Guards _profiles: request threads append while admin routes iterate
+_profiles_lock = threading.Lock()
+
+
+def _wants_profile():
+    if request.headers.get(PROFILE_HEADER) == '1' or request.args.get(PROFILE_QUERY) == '1':
+        return True
+    if PROFILE_SAMPLE_RATE > 0 and next(_request_counter) % PROFILE_SAMPLE_RATE == 0:
+        return True
+    return False
+
+
+def _start_profile():
+    if not _wants_profile():
+        return
+    if not _profile_lock.acquire(blocking=False):
+        return
+
+    g._profiler = cProfile.Profile()
+    g._profile_started = time.perf_counter()
+    g._profiler.enable()
+
+
+def _stop_profile():
+    profiler = g.pop('_profiler', None)
+    if profiler is None:
+        return None, None
+    profiler.disable()
+    duration_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000
+    _profile_lock.release()
+    return profiler, duration_ms
+
+
+def _timing_breakdown(stats):
+    """Top functions by cumulative time as plain dicts."""
+    rows = []
+    for (filename, lineno, funcname), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{lineno}({funcname})",
+            'calls': nc,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda r: r['cumtime_ms'], reverse=True)
+    return rows[:PROFILE_TOP_N]
+
+
+def _record_profile(response):
+    profiler, duration_ms = _stop_profile()
+    if profiler is None:
+        return response
+
+    if duration_ms >= PROFILE_SLOW_MS:
+        stats = pstats.Stats(profiler)
+        entry = {
+            'id': next(_profile_ids),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'duration_ms': round(duration_ms, 3),
+            'breakdown': _timing_breakdown(stats),
+            # Same format as cProfile's .prof files (snakeviz, flameprof, gprof2dot)
+            'pstats': marshal.dumps(stats.stats),
+        }
+        with _profiles_lock:
+            _profiles.append(entry)
+
+    response.headers['X-Profile-Duration-Ms'] = f"{duration_ms:.3f}"
+    return response
+
+
+def _cleanup_profile(exc):
+    # after_request is skipped on some error paths; make sure the lock is freed
+    _stop_profile()
+
+
+def _snapshot():
+    with _profiles_lock:
+        return list(_profiles)
+
+
+def _find_profile(profile_id):
+    for entry in _snapshot():
+        if entry['id'] == profile_id:
+            return entry
+    abort(404)
+
+
+# ==================== ADMIN ROUTES ==================== #
+
+def _require_admin():
+    """Profiles expose request paths and query strings: token holders or localhost only."""
+    if PROFILE_TOKEN:
+        if not hmac.compare_digest(request.headers.get(PROFILE_TOKEN_HEADER, ''), PROFILE_TOKEN):
+            abort(403)
+    elif request.remote_addr not in LOCAL_ADDRS:
+        abort(403)
+
+
+def list_profiles():
+    _require_admin()
+    return jsonify([
+        {k: v for k, v in entry.items() if k != 'pstats'}
+        for entry in reversed(_snapshot())
+    ])
+
+
+def get_profile(profile_id):
+    _require_admin()
+    entry = _find_profile(profile_id)
+    fmt = request.args.get('format', 'json')
+
+    if fmt == 'pstats':
+        return Response(entry['pstats'], mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename=request_{profile_id}.prof'})
+
+    if fmt == 'text':
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = marshal.loads(entry['pstats'])
+        stats.get_top_level_stats()
+        stats.sort_stats('cumulative').print_stats(40)
+        return Response(stream.getvalue(), mimetype='text/plain')
+
+    return jsonify({k: v for k, v in entry.items() if k != 'pstats'})
+
+
+def clear_profiles():
+    _require_admin()
+    with _profiles_lock:
+        _profiles.clear()
+    return jsonify({'success': True})
+
+
+def init_profiler(app):
+    """Attach the profiler hooks and admin routes. No-op unless PROFILER_ENABLED=1."""
+    if not PROFILER_ENABLED:
+        return
+
+    app.before_request(_start_profile)
+    app.after_request(_record_profile)
+    app.teardown_request(_cleanup_profile)
+
+    app.add_url_rule('/admin/profiles', 'list_profiles', list_profiles, methods=['GET'])
+    app.add_url_rule('/admin/profiles/<int:profile_id>', 'get_profile', get_profile, methods=['GET'])
+    app.add_url_rule('/admin/profiles', 'clear_profiles', clear_profiles, methods=['DELETE'])
+
+    print(f"🔬 Profiler enabled: sample 1-in-{PROFILE_SAMPLE_RATE or '∞'}, "
+          f"keep {PROFILE_KEEP} requests slower than {PROFILE_SLOW_MS:.0f} ms")
@@ -0,0 +1,88 @@
+# serialization.py - Single-pass JSON encoding and response compression
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.utils
+from flask import request, Response
+
+# orjson encodes NumPy arrays/scalars, NaN and datetimes natively
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESS_MIN_BYTES = 1024     # smaller bodies aren't worth compressing
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+if ORJSON_AVAILABLE:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Types orjson doesn't handle on its own."""
+    # Plotly figures: encode the underlying dict in the same pass
+    if hasattr(obj, 'to_plotly_json'):
+        return obj.to_plotly_json()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    # Non-contiguous or object-dtype arrays fall through to here
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj):
+    """Encode ``obj`` to UTF-8 JSON bytes. NaN becomes null."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    # PlotlyJSONEncoder covers numpy, pandas and NaN -> null
+    return json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8')
+
+
+def records(df):
+    """DataFrame rows as a list of dicts with NaN replaced by None, without per-cell Python checks."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def json_response(payload, status=200):
+    """Drop-in for ``jsonify`` that encodes once and compresses large bodies."""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    encoding = _negotiate_encoding()
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+    else:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,179 @@
+# shelf_life.py - Vectorized shelf-life estimation and expiry index
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+# Timestamp columns hold naive local wall-clock times
+LOCAL_TZ = tzlocal()
+
+# Base shelf life in days (low, high) at neutral storage conditions
+BASE_SHELF_LIFE = {
+    'Unripe': (5, 7),
+    'Ripe': (2, 3),
+    'Overripe': (0, 0),
+}
+
+# Per-fruit multiplier on the base shelf life. Neutral for now, so results
+# match the old browser calculation; tune here and run /recompute_shelf_life.
+FRUIT_FACTORS = {
+    'Apple': 1.0,
+    'Orange': 1.0,
+}
+
+
+def estimate_shelf_life(ripeness, fruit_type, temperature, humidity):
+    """Return (low_days, high_days) arrays for whole columns at once.
+
+    Inputs are array-likes of equal length. Rows with an unknown ripeness
+    (e.g. 'Not Fruit') come back as NaN. Missing temperature/humidity
+    falls back to the base shelf life.
+    """
+    ripeness = np.asarray(ripeness, dtype=object)
+    fruit_type = np.asarray(fruit_type, dtype=object)
+    temp = np.asarray(temperature, dtype='float64')
+    hum = np.asarray(humidity, dtype='float64')
+
+    low = np.full(len(ripeness), np.nan)
+    high = np.full(len(ripeness), np.nan)
+    for stage, (base_low, base_high) in BASE_SHELF_LIFE.items():
+        mask = ripeness == stage
+        low[mask] = base_low
+        high[mask] = base_high
+
+    fruit_factor = np.ones(len(fruit_type))
+    for fruit, factor in FRUIT_FACTORS.items():
+        fruit_factor[fruit_type == fruit] = factor
+
+    has_env = ~(np.isnan(temp) | np.isnan(hum))
+    with np.errstate(invalid='ignore'):
+        env_factor = np.select(
+            [
+                ~has_env,
+                temp > 30,
+                (temp >= 20) & (temp <= 30) & (hum >= 50) & (hum <= 80),
+                (temp < 20) & (hum >= 55) & (hum <= 65),
+            ],
+            [1.0, 0.6, 1.0, 1.2],
+            default=0.8,
+        )
+
+    factor = env_factor * fruit_factor
+    # Round half up, matching the old browser calculation
+    low = np.maximum(0, np.floor(low * factor + 0.5))
+    high = np.maximum(0, np.floor(high * factor + 0.5))
+    return low, high
+
+
+def format_shelf_life(low, high):
+    """Vectorized '2-3 days' labels; NaN rows become None."""
+    low = pd.Series(np.asarray(low, dtype='float64')).astype('Int64')
+    high = pd.Series(np.asarray(high, dtype='float64')).astype('Int64')
+    labels = low.astype(str) + '-' + high.astype(str) + ' days'
+    labels = labels.mask(high == 0, '0 days')
+    return labels.astype(object).mask(low.isna(), None).to_numpy()
+
+
+def to_epoch(timestamps):
+    """Naive local datetimes -> Int64 epoch seconds (NaT -> <NA>)."""
+    local = pd.Series(pd.to_datetime(timestamps, errors='coerce')).dt.tz_localize(
+        LOCAL_TZ, ambiguous='NaT', nonexistent='shift_forward')
+    return ((local - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).astype('Int64')
+
+
+def expiry_epochs(values):
+    """Epoch seconds from an Expiry_Timestamp column, also accepting the old date strings."""
+    values = pd.Series(values)
+    epochs = pd.to_numeric(values, errors='coerce')
+    legacy = epochs.isna() & values.notna()
+    if legacy.any():
+        epochs[legacy] = to_epoch(values[legacy]).astype('float64')
+    return epochs.astype('Int64')
+
+
+def compute_shelf_life(df):
+    """Recompute Shelf_Life and Expiry_Timestamp for every row of ``df`` in one pass.
+
+    Only rows that have sensor readings get a shelf life, mirroring the
+    result page flow. Expiry uses the conservative (low) estimate and is
+    stored as epoch seconds.
+    """
+    df = df.copy()
+    has_env = df['Temperature_C'].notna() & df['Humidity_pct'].notna()
+
+    low, high = estimate_shelf_life(df['Ripeness'], df['Fruit_Type'],
+                                    df['Temperature_C'], df['Humidity_pct'])
+    low = np.where(has_env, low, np.nan)
+    high = np.where(has_env, high, np.nan)
+
+    analysed_at = pd.to_datetime(df['Timestamp'], errors='coerce')
+    expiry = analysed_at + pd.to_timedelta(low, unit='D')
+
+    df['Shelf_Life'] = format_shelf_life(low, high)
+    df['Expiry_Timestamp'] = to_epoch(expiry).to_numpy()
+    return df
+
+
+# ==================== EXPIRY INDEX ==================== #
+
+# Columns kept alongside each indexed ID so lookups never touch the CSV
+INDEX_FIELDS = ['ID', 'Timestamp', 'Fruit_Type', 'Ripeness', 'Shelf_Life', 'Expiry_Timestamp']
+
+
+class ExpiryIndex:
+    """Result IDs kept sorted by expiry time for range lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []       # sorted (expiry_epoch, result_id)
+        self._expiry = {}     # result_id -> expiry_epoch
+        self._info = {}       # result_id -> row details returned by lookups
+
+    def rebuild(self, df):
+        keys, info = [], {}
+        # CSVs from before server-side shelf life have no expiry column at all
+        if 'Expiry_Timestamp' in df.columns:
+            valid = df.reindex(columns=INDEX_FIELDS)
+            valid = valid.assign(Expiry_Timestamp=expiry_epochs(valid['Expiry_Timestamp']))
+            valid = valid[valid['Expiry_Timestamp'].notna()]
+            for record in valid.astype(object).where(valid.notna(), None).to_dict('records'):
+                rid = int(record['ID'])
+                record['Expiry_Timestamp'] = int(record['Expiry_Timestamp'])
+                keys.append((record['Expiry_Timestamp'], rid))
+                info[rid] = record
+            keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._expiry = {rid: epoch for epoch, rid in keys}
+            self._info = info
+
+    def update(self, record):
+        """Insert or move one result row (needs the INDEX_FIELDS columns)."""
+        result_id = int(record['ID'])
+        expiry_timestamp = record.get('Expiry_Timestamp')
+        with self._lock:
+            old = self._expiry.pop(result_id, None)
+            self._info.pop(result_id, None)
+            if old is not None:
+                i = bisect_left(self._keys, (old, result_id))
+                del self._keys[i]
+            if expiry_timestamp is None or pd.isna(expiry_timestamp):
+                return
+            epoch = int(expiry_timestamp)
+            insort(self._keys, (epoch, result_id))
+            self._expiry[result_id] = epoch
+            self._info[result_id] = {k: record.get(k) for k in INDEX_FIELDS}
+            self._info[result_id]['Expiry_Timestamp'] = epoch
+
+    def expiring_within(self, hours, now=None):
+        """Rows expiring between ``now`` and ``now + hours``, soonest first."""
+        now = now or datetime.now()
+        start = now.timestamp()
+        end = start + hours * 3600
+        with self._lock:
+            lo = bisect_left(self._keys, (start, -1))
+            hi = bisect_right(self._keys, (end, float('inf')))
+            return [self._info[rid] for _, rid in self._keys[lo:hi]]
@@ -0,0 +1,272 @@
+# stream_ingest.py - Video / camera-stream ingestion with frame sampling and duplicate skipping
+# CLI for live sources: python stream_ingest.py SOURCE [--flush-every 30] [--max-frames 0]
+#   SOURCE: video file, RTSP/HTTP URL, camera index, '-' (MJPEG on stdin) or an MJPEG FIFO
+import argparse
+import itertools
+import os
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app import get_predictions, interpret_prediction
+
+# Ingestion defaults (overridable per request)
+SAMPLE_FPS = 2.0            # frames per second to look at
+DIFF_THRESHOLD = 8.0        # mean abs pixel difference (0-255) below which a frame is a duplicate
+BATCH_SIZE = 16             # frames per model call
+SOURCE_FPS_FALLBACK = 30.0  # for MJPEG pipes and sources that don't report FPS
+DIFF_SIZE = (32, 32)        # frames are compared at this size
+MAX_FRAMES = 9000           # frames read per HTTP request (5 min at 30 fps)
+FLUSH_SECONDS = 30.0        # CLI: append finished items to the CSV this often
+
+# HTTP requests may only name regular files under this directory (unset = uploads only)
+INGEST_DIR = os.environ.get('INGEST_DIR')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.mjpeg', '.mjpg')
+
+MJPEG_CHUNK_BYTES = 64 * 1024
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+
+
+# ==================== FRAME SOURCES ==================== #
+
+def iter_mjpeg_frames(stream):
+    """Split a raw MJPEG byte stream (file, pipe or stdin) into decoded BGR frames."""
+    buffer = b''
+    while True:
+        chunk = stream.read(MJPEG_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer += chunk
+        while True:
+            start = buffer.find(JPEG_SOI)
+            if start == -1:
+                buffer = buffer[-1:]   # keep a possible half marker
+                break
+            end = buffer.find(JPEG_EOI, start + 2)
+            if end == -1:
+                break
+            jpg = np.frombuffer(buffer[start:end + 2], dtype=np.uint8)
+            buffer = buffer[end + 2:]
+            frame = cv2.imdecode(jpg, cv2.IMREAD_COLOR)
+            if frame is not None:
+                yield frame
+
+
+def iter_capture_frames(cap):
+    """Frames from an opened cv2.VideoCapture; releases it when exhausted."""
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def open_source(source):
+    """Return (frames, source_fps) for a path, URL, '-' (stdin MJPEG) or .mjpeg file."""
+    if source == '-':
+        return iter_mjpeg_frames(sys.stdin.buffer), SOURCE_FPS_FALLBACK
+    if str(source).lower().endswith(('.mjpeg', '.mjpg')):
+        return _mjpeg_file_frames(source), SOURCE_FPS_FALLBACK
+
+    # Anything OpenCV can open: video files, RTSP/HTTP URLs, device indexes
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return iter_capture_frames(cap), fps if fps and fps > 0 else SOURCE_FPS_FALLBACK
+
+
+def _mjpeg_file_frames(path):
+    with open(path, 'rb') as f:
+        yield from iter_mjpeg_frames(f)
+
+
+def ingest_dir_path(name):
+    """Resolve a client-supplied file name to a regular video file inside INGEST_DIR."""
+    if not INGEST_DIR:
+        raise ValueError("Server-side sources are disabled; upload a 'video' file instead")
+    root = os.path.realpath(INGEST_DIR)
+    path = os.path.realpath(os.path.join(root, name))
+    # realpath resolves symlinks, so links pointing outside the directory are rejected too
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise ValueError(f"No such file in the ingest directory: {name}")
+    if not path.lower().endswith(VIDEO_EXTENSIONS):
+        raise ValueError(f"Unsupported video type: {name}")
+    return path
+
+
+# ==================== SAMPLING ==================== #
+
+def _thumbnail(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, DIFF_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def sample_frames(frames, source_fps, sample_fps=SAMPLE_FPS, diff_threshold=DIFF_THRESHOLD, stats=None):
+    """Yield (frame_index, frame) for frames kept after rate sampling and duplicate skipping.
+
+    A frame is a duplicate when its downscaled grayscale difference from the
+    last kept frame is below ``diff_threshold``.
+    """
+    stride = max(1, int(round(source_fps / sample_fps))) if sample_fps > 0 else 1
+    stats = stats if stats is not None else {}
+    stats.update(frames_read=0, frames_sampled=0, frames_duplicate=0)
+    last_thumb = None
+
+    for index, frame in enumerate(frames):
+        stats['frames_read'] += 1
+        if index % stride:
+            continue
+        stats['frames_sampled'] += 1
+
+        thumb = _thumbnail(frame)
+        if last_thumb is not None and np.abs(thumb - last_thumb).mean() < diff_threshold:
+            stats['frames_duplicate'] += 1
+            continue
+        last_thumb = thumb
+        yield index, frame
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==================== AGGREGATION ==================== #
+
+def _item_result(frames):
+    """Combine the frames of one item by averaging their probabilities."""
+    ripeness_probs = np.mean([r['ripeness_probs'] for _, r in frames], axis=0)
+    fruit_probs = np.mean([r['fruit_probs'] for _, r in frames], axis=0)
+    result = interpret_prediction(ripeness_probs, fruit_probs)
+    result['first_frame'] = frames[0][0]
+    result['last_frame'] = frames[-1][0]
+    result['frames'] = len(frames)
+    return result
+
+
+def check_settings(sample_fps, batch_size):
+    """Reject settings that would turn the stream into one unbounded batch."""
+    if sample_fps <= 0:
+        raise ValueError(f"sample_fps must be positive, got {sample_fps}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+
+def iter_items(frames, source_fps, sample_fps=SAMPLE_FPS, diff_threshold=DIFF_THRESHOLD,
+               batch_size=BATCH_SIZE, stats=None):
+    """Run sampled, de-duplicated frames through batched inference and yield items as they close.
+
+    An item is a run of consecutive fruit frames of the same fruit type;
+    'Not Fruit' frames (empty belt) and fruit-type changes close the
+    current item.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(frames_inferred=0, source_fps=source_fps)
+    current = []
+
+    kept = sample_frames(frames, source_fps, sample_fps, diff_threshold, stats)
+    for batch in _batches(kept, batch_size):
+        images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for _, frame in batch]
+        results = get_predictions(images)
+        stats['frames_inferred'] += len(results)
+
+        for (index, _), result in zip(batch, results):
+            if current and (not result['is_fruit'] or current[-1][1]['fruit'] != result['fruit']):
+                yield _item_result(current)
+                current = []
+            if result['is_fruit']:
+                current.append((index, result))
+    if current:
+        yield _item_result(current)
+
+
+def ingest_stream(source, sample_fps=SAMPLE_FPS, diff_threshold=DIFF_THRESHOLD, batch_size=BATCH_SIZE,
+                  max_frames=MAX_FRAMES):
+    """Ingest at most ``max_frames`` frames of ``source``. Returns (items, stats).
+
+    ``stats['frame_limit_reached']`` tells the caller the source may have been cut short.
+    """
+    check_settings(sample_fps, batch_size)
+    frames, source_fps = open_source(source)
+    stats = {}
+    try:
+        limited = itertools.islice(frames, max_frames) if max_frames else frames
+        items = list(iter_items(limited, source_fps, sample_fps, diff_threshold, batch_size, stats))
+    finally:
+        frames.close()   # release the capture / file even when stopped early
+    stats['frame_limit_reached'] = bool(max_frames) and stats['frames_read'] >= max_frames
+    return items, stats
+
+
+# ==================== CLI ==================== #
+
+def main(args):
+    """Ingest a live or local source, appending finished items to the CSV every --flush-every seconds.
+
+    Safe to run next to the server: append_results takes a file lock and
+    assigns IDs from the CSV itself.
+    """
+    # Imported here: backend imports this module for the HTTP route
+    from backend import make_entry, append_results
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    frames, source_fps = open_source(source)
+    limited = itertools.islice(frames, args.max_frames) if args.max_frames else frames
+
+    stats, pending, saved = {}, [], 0
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal saved, last_flush
+        if pending:
+            timestamp = datetime.now()
+            append_results([make_entry(item, 'Video Stream', timestamp) for item in pending])
+            saved += len(pending)
+            pending.clear()
+        last_flush = time.monotonic()
+
+    try:
+        for item in iter_items(limited, source_fps, args.sample_fps, args.diff_threshold,
+                               args.batch_size, stats):
+            pending.append(item)
+            print(f"🍎 {item['fruit']} ({item['ripeness']}), frames {item['first_frame']}-{item['last_frame']}")
+            if time.monotonic() - last_flush >= args.flush_every:
+                flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        frames.close()
+        flush()
+    print(f"🎞️ Stream ingested: {stats.get('frames_read', 0)} frames read, "
+          f"{stats.get('frames_inferred', 0)} inferred, {saved} items saved")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', help="video file, URL, camera index, '-' for MJPEG on stdin, or a FIFO")
+    parser.add_argument('--sample-fps', type=float, default=SAMPLE_FPS)
+    parser.add_argument('--diff-threshold', type=float, default=DIFF_THRESHOLD)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--max-frames', type=int, default=0, help='stop after this many frames (0 = no limit)')
+    parser.add_argument('--flush-every', type=float, default=FLUSH_SECONDS, help='seconds between CSV appends')
+    args = parser.parse_args()
+    try:
+        check_settings(args.sample_fps, args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    main(args)
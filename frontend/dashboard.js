@@ -19,11 +19,14 @@ async function loadDashboardData() {
     }
     
     const data = await response.json();
+    if (data.schemaVersion !== CHART_SCHEMA_VERSION) {
+      console.warn(`Chart schema ${data.schemaVersion} does not match dashboard (${CHART_SCHEMA_VERSION}); reload the page.`);
+    }
     dashboardData = data;
     filteredData = data;
     
     // Populate filters
-    populateFilters(data.rawData);
+    populateFilters(data.filterOptions);
     
     // Display metrics
     displayMetrics(data.metrics);
@@ -63,22 +66,136 @@ function displayInsights(insights) {
   ).join('');
 }
 
+// ==================== CHART TEMPLATES ==================== //
+// The backend sends aggregated series only (see chart_specs.py); figures are
+// built here from shared templates. Keep in sync with CHART_SCHEMA_VERSION.
+
+const CHART_SCHEMA_VERSION = 1;
+
+const RIPENESS_COLORS = {'Unripe': '#90EE90', 'Ripe': '#FFD700', 'Overripe': '#FF6347', 'Not Fruit': '#808080'};
+const PLOT_CONFIG = {responsive: true};
+
+function baseLayout(title, extra = {}) {
+  return Object.assign({
+    title: {text: title},
+    margin: {t: 60, r: 20, b: 50, l: 60},
+    legend: {tracegroupgap: 0}
+  }, extra);
+}
+
+function pieFigure(spec, title, options = {}) {
+  const trace = {type: 'pie', labels: spec.labels, values: spec.values, hole: options.hole || 0};
+  if (options.colors) {
+    trace.marker = {colors: spec.labels.map(l => options.colors[l])};
+  }
+  return {data: [trace], layout: baseLayout(title, {legend: {title: {text: options.legendTitle || ''}}})};
+}
+
+function barFigure(spec, title, barmode) {
+  const data = spec.series.map((name, i) => ({
+    type: 'bar', name: name, x: spec.x, y: spec.z[i],
+    marker: {color: RIPENESS_COLORS[name]}
+  }));
+  return {data, layout: baseLayout(title, {barmode, xaxis: {title: {text: 'Fruit_Type'}}, yaxis: {title: {text: 'Count'}}})};
+}
+
+function boxFigure(spec, title, xTitle, yTitle, colors) {
+  // One trace per group so each gets its own color, as with px.box(color=...)
+  const data = spec.groups.map((group, i) => ({
+    type: 'box', name: group, x: [group],
+    q1: [spec.q1[i]], median: [spec.median[i]], q3: [spec.q3[i]],
+    lowerfence: [spec.lowerfence[i]], upperfence: [spec.upperfence[i]], mean: [spec.mean[i]],
+    marker: colors ? {color: colors[group]} : undefined,
+    hovertemplate: `${group}<br>n=${spec.n[i]}<extra></extra>`
+  }));
+  return {data, layout: baseLayout(title, {xaxis: {title: {text: xTitle}}, yaxis: {title: {text: yTitle}}})};
+}
+
+function histogramFigure(spec, title, xTitle, color) {
+  const centers = spec.counts.map((_, i) => (spec.edges[i] + spec.edges[i + 1]) / 2);
+  const widths = spec.counts.map((_, i) => spec.edges[i + 1] - spec.edges[i]);
+  return {
+    data: [{type: 'bar', x: centers, y: spec.counts, width: widths, marker: {color}}],
+    layout: baseLayout(title, {bargap: 0, xaxis: {title: {text: xTitle}}, yaxis: {title: {text: 'Frequency'}}})
+  };
+}
+
+function scatterFigure(spec, title, xTitle, yTitle) {
+  // Specs omit size when it is the x column
+  const sizes = group => group.size || group.x;
+  // Same marker scaling as plotly express: the largest value gets a 20px marker.
+  // Plain reduce: Math.max(...values) overflows the call stack on long histories
+  const maxSize = Object.values(spec).reduce(
+    (max, group) => sizes(group).reduce((m, v) => (v !== null && v > m ? v : m), max), 1);
+  const data = Object.entries(spec).map(([name, group]) => ({
+    type: 'scatter', mode: 'markers', name: name, x: group.x, y: group.y,
+    marker: {size: sizes(group), sizemode: 'area', sizeref: 2 * maxSize / (20 * 20), color: RIPENESS_COLORS[name]}
+  }));
+  return {data, layout: baseLayout(title, {xaxis: {title: {text: xTitle}}, yaxis: {title: {text: yTitle}}, legend: {title: {text: 'Ripeness'}}})};
+}
+
+function heatmapFigure(spec, title, colorscale, colorTitle) {
+  return {
+    data: [{
+      type: 'heatmap', x: spec.x, y: spec.y, z: spec.z, colorscale,
+      texttemplate: '%{z:.1f}', colorbar: {title: {text: colorTitle}}
+    }],
+    layout: baseLayout(title, {yaxis: {autorange: 'reversed'}})
+  };
+}
+
+function timelineFigure(spec) {
+  return {
+    data: [
+      {type: 'scatter', mode: 'lines+markers', name: 'Temperature', x: spec.x, y: spec.temperature,
+       line: {color: '#FF6347', width: 2}, marker: {size: 8}, xaxis: 'x', yaxis: 'y'},
+      {type: 'scatter', mode: 'lines+markers', name: 'Humidity', x: spec.x, y: spec.humidity,
+       line: {color: '#4682B4', width: 2}, marker: {size: 8}, xaxis: 'x2', yaxis: 'y2'}
+    ],
+    layout: baseLayout('', {
+      height: 600, showlegend: false,
+      xaxis: {anchor: 'y', matches: 'x2', showticklabels: false},
+      yaxis: {domain: [0.56, 1]},
+      xaxis2: {anchor: 'y2'},
+      yaxis2: {domain: [0, 0.44]},
+      annotations: [
+        {text: 'Temperature (°C)', x: 0.5, y: 1.0, xref: 'paper', yref: 'paper', xanchor: 'center', yanchor: 'bottom', showarrow: false},
+        {text: 'Humidity (%)', x: 0.5, y: 0.44, xref: 'paper', yref: 'paper', xanchor: 'center', yanchor: 'bottom', showarrow: false}
+      ]
+    })
+  };
+}
+
+function gaugeFigure(value, title, max, color, steps) {
+  return {
+    data: [{
+      type: 'indicator', mode: 'gauge+number', value, title: {text: title},
+      gauge: {axis: {range: [0, max]}, bar: {color}, steps}
+    }],
+    layout: baseLayout('', {height: 300})
+  };
+}
+
+function plot(elementId, figure) {
+  Plotly.newPlot(elementId, figure.data, figure.layout, PLOT_CONFIG);
+}
+
 function renderAllCharts(charts) {
   // Environmental Conditions
-  if (charts.tempHumCombined) {
-    Plotly.newPlot('tempHumCombinedChart', charts.tempHumCombined.data, charts.tempHumCombined.layout, {responsive: true});
+  if (charts.tempHumTimeline) {
+    plot('tempHumCombinedChart', timelineFigure(charts.tempHumTimeline));
   }
   
   if (charts.tempDistribution) {
-    Plotly.newPlot('tempDistributionChart', charts.tempDistribution.data, charts.tempDistribution.layout, {responsive: true});
+    plot('tempDistributionChart', histogramFigure(charts.tempDistribution, 'Temperature Distribution', 'Temperature (°C)', '#FF6347'));
   }
   
   if (charts.humDistribution) {
-    Plotly.newPlot('humDistributionChart', charts.humDistribution.data, charts.humDistribution.layout, {responsive: true});
+    plot('humDistributionChart', histogramFigure(charts.humDistribution, 'Humidity Distribution', 'Humidity (%)', '#4682B4'));
   }
   
   if (charts.tempHumCorrelation) {
-    Plotly.newPlot('tempHumCorrelationChart', charts.tempHumCorrelation.data, charts.tempHumCorrelation.layout, {responsive: true});
+    plot('tempHumCorrelationChart', scatterFigure(charts.tempHumCorrelation, 'Temperature vs Humidity by Ripeness', 'Temperature_C', 'Humidity_pct'));
   }
   
   // Environmental stats
@@ -88,37 +205,44 @@ function renderAllCharts(charts) {
   
   // Box plots by category
   if (charts.tempByFruit) {
-    Plotly.newPlot('tempByFruitChart', charts.tempByFruit.data, charts.tempByFruit.layout, {responsive: true});
+    plot('tempByFruitChart', boxFigure(charts.tempByFruit, 'Temperature by Fruit Type', 'Fruit_Type', 'Temperature_C'));
   }
   
   if (charts.tempByRipeness) {
-    Plotly.newPlot('tempByRipenessChart', charts.tempByRipeness.data, charts.tempByRipeness.layout, {responsive: true});
+    plot('tempByRipenessChart', boxFigure(charts.tempByRipeness, 'Temperature by Ripeness', 'Ripeness', 'Temperature_C', RIPENESS_COLORS));
   }
   
   if (charts.humByFruit) {
-    Plotly.newPlot('humByFruitChart', charts.humByFruit.data, charts.humByFruit.layout, {responsive: true});
+    plot('humByFruitChart', boxFigure(charts.humByFruit, 'Humidity by Fruit Type', 'Fruit_Type', 'Humidity_pct'));
   }
   
   if (charts.humByRipeness) {
-    Plotly.newPlot('humByRipenessChart', charts.humByRipeness.data, charts.humByRipeness.layout, {responsive: true});
+    plot('humByRipenessChart', boxFigure(charts.humByRipeness, 'Humidity by Ripeness', 'Ripeness', 'Humidity_pct', RIPENESS_COLORS));
   }
   
   // Heatmaps
   if (charts.tempHeatmap) {
-    Plotly.newPlot('tempHeatmapChart', charts.tempHeatmap.data, charts.tempHeatmap.layout, {responsive: true});
+    plot('tempHeatmapChart', heatmapFigure(charts.tempHeatmap, 'Average Temperature by Category', 'Reds', 'Temp (°C)'));
   }
   
   if (charts.humHeatmap) {
-    Plotly.newPlot('humHeatmapChart', charts.humHeatmap.data, charts.humHeatmap.layout, {responsive: true});
+    plot('humHeatmapChart', heatmapFigure(charts.humHeatmap, 'Average Humidity by Category', 'Blues', 'Humidity (%)'));
   }
   
   // Gauges
-  if (charts.tempGauge) {
-    Plotly.newPlot('tempGaugeChart', charts.tempGauge.data, charts.tempGauge.layout, {responsive: true});
-  }
-  
-  if (charts.humGauge) {
-    Plotly.newPlot('humGaugeChart', charts.humGauge.data, charts.humGauge.layout, {responsive: true});
+  if (charts.stats) {
+    plot('tempGaugeChart', gaugeFigure(charts.stats.avgTemp, 'Average Temperature', 40, '#FF6347', [
+      {range: [0, 10], color: '#ADD8E6'},
+      {range: [10, 20], color: '#90EE90'},
+      {range: [20, 30], color: '#FFD700'},
+      {range: [30, 40], color: '#FF6347'}
+    ]));
+    plot('humGaugeChart', gaugeFigure(charts.stats.avgHum, 'Average Humidity', 100, '#4682B4', [
+      {range: [0, 30], color: '#FFE4B5'},
+      {range: [30, 50], color: '#ADD8E6'},
+      {range: [50, 70], color: '#90EE90'},
+      {range: [70, 100], color: '#4682B4'}
+    ]));
   }
   
   // Quality status
@@ -128,35 +252,32 @@ function renderAllCharts(charts) {
   
   // Core charts
   if (charts.confidenceScatter) {
-    Plotly.newPlot('confidenceScatterChart', charts.confidenceScatter.data, charts.confidenceScatter.layout, {responsive: true});
+    plot('confidenceScatterChart', scatterFigure(charts.confidenceScatter, 'Fruit vs Ripeness Confidence', 'Fruit_Confidence', 'Ripeness_Confidence'));
   }
   
   if (charts.sourceDistribution) {
-    Plotly.newPlot('sourceDistributionChart', charts.sourceDistribution.data, charts.sourceDistribution.layout, {responsive: true});
+    plot('sourceDistributionChart', pieFigure(charts.sourceDistribution, 'Data Source Breakdown', {hole: 0.5}));
   }
   
   if (charts.fruitDistribution) {
-    Plotly.newPlot('fruitDistributionChart', charts.fruitDistribution.data, charts.fruitDistribution.layout, {responsive: true});
+    plot('fruitDistributionChart', pieFigure(charts.fruitDistribution, 'Fruit Type Distribution'));
   }
   
   if (charts.ripenessDistribution) {
-    Plotly.newPlot('ripenessDistributionChart', charts.ripenessDistribution.data, charts.ripenessDistribution.layout, {responsive: true});
-  }
-  
-  if (charts.stackedBar) {
-    Plotly.newPlot('stackedBarChart', charts.stackedBar.data, charts.stackedBar.layout, {responsive: true});
+    plot('ripenessDistributionChart', pieFigure(charts.ripenessDistribution, 'Ripeness Distribution', {colors: RIPENESS_COLORS}));
   }
   
-  if (charts.groupedBar) {
-    Plotly.newPlot('groupedBarChart', charts.groupedBar.data, charts.groupedBar.layout, {responsive: true});
+  if (charts.fruitRipeness) {
+    plot('stackedBarChart', barFigure(charts.fruitRipeness, 'Fruit Type by Ripeness Level', 'stack'));
+    plot('groupedBarChart', barFigure(charts.fruitRipeness, 'Fruit Type by Ripeness (Grouped)', 'group'));
   }
   
   if (charts.fruitConfBox) {
-    Plotly.newPlot('fruitConfBoxChart', charts.fruitConfBox.data, charts.fruitConfBox.layout, {responsive: true});
+    plot('fruitConfBoxChart', boxFigure(charts.fruitConfBox, 'Fruit Confidence Distribution', 'Fruit_Type', 'Fruit_Confidence'));
   }
   
   if (charts.ripenessConfBox) {
-    Plotly.newPlot('ripenessConfBoxChart', charts.ripenessConfBox.data, charts.ripenessConfBox.layout, {responsive: true});
+    plot('ripenessConfBoxChart', boxFigure(charts.ripenessConfBox, 'Ripeness Confidence Distribution', 'Ripeness', 'Ripeness_Confidence', RIPENESS_COLORS));
   }
 }
 
@@ -182,28 +303,23 @@ function displayQualityStatus(status) {
   }
 }
 
-function populateFilters(rawData) {
-  if (!rawData || rawData.length === 0) return;
+function populateFilters(options) {
+  if (!options) return;
   
   // Fruit filter
-  const fruitTypes = [...new Set(rawData.map(d => d.Fruit_Type))];
   const fruitFilter = document.getElementById('fruitFilter');
   fruitFilter.innerHTML = '<option value="all" selected>All</option>' +
-    fruitTypes.map(f => `<option value="${f}">${f}</option>`).join('');
+    options.fruits.map(f => `<option value="${f}">${f}</option>`).join('');
   
   // Ripeness filter
-  const ripenessTypes = [...new Set(rawData.map(d => d.Ripeness))];
   const ripenessFilter = document.getElementById('ripenessFilter');
   ripenessFilter.innerHTML = '<option value="all" selected>All</option>' +
-    ripenessTypes.map(r => `<option value="${r}">${r}</option>`).join('');
+    options.ripeness.map(r => `<option value="${r}">${r}</option>`).join('');
   
   // Date range
-  const dates = rawData.map(d => new Date(d.Date)).filter(d => !isNaN(d));
-  if (dates.length > 0) {
-    const minDate = new Date(Math.min(...dates));
-    const maxDate = new Date(Math.max(...dates));
-    document.getElementById('dateFrom').value = minDate.toISOString().split('T')[0];
-    document.getElementById('dateTo').value = maxDate.toISOString().split('T')[0];
+  if (options.dateMin && options.dateMax) {
+    document.getElementById('dateFrom').value = options.dateMin;
+    document.getElementById('dateTo').value = options.dateMax;
   }
 }
 
@@ -220,7 +336,14 @@ function clearFilters() {
 }
 
 function downloadCSV() {
-  window.location.href = 'http://127.0.0.1:5000/download_csv';
+  // Export only what the current filters select
+  const params = new URLSearchParams({
+    fruit: document.getElementById('fruitFilter').value,
+    ripeness: document.getElementById('ripenessFilter').value,
+    date_from: document.getElementById('dateFrom').value,
+    date_to: document.getElementById('dateTo').value
+  });
+  window.location.href = `http://127.0.0.1:5000/export?${params}`;
 }
 
 function refreshDashboard() {
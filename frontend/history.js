@@ -85,7 +85,11 @@ function clearFilters() {
 }
 
 function downloadHistoryCSV() {
-  window.location.href = 'http://127.0.0.1:5000/download_csv';
+  const params = new URLSearchParams({
+    fruit: document.getElementById('fruitFilter').value,
+    ripeness: document.getElementById('ripenessFilter').value
+  });
+  window.location.href = `http://127.0.0.1:5000/export?${params}`;
 }
 
 // Navigation functions
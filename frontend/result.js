@@ -66,14 +66,11 @@ async function readSensor() {
     document.getElementById('humValue').textContent = data.humidity.toFixed(1);
     document.getElementById('sensorData').style.display = 'block';
     
-    // Calculate and display shelf life
-    const shelfLife = calculateShelfLife(currentRipeness, data.temperature, data.humidity);
-    document.getElementById('shelfLifeValue').textContent = shelfLife;
+    // Save readings; the backend estimates shelf life from them
+    const updated = await updateResultWithIoT(data.temperature, data.humidity);
+    document.getElementById('shelfLifeValue').textContent = (updated && updated.shelf_life) || 'N/A';
     document.getElementById('shelfLifeBox').style.display = 'block';
     
-    // Update result in CSV
-    await updateResultWithIoT(data.temperature, data.humidity, shelfLife);
-    
     loadingOverlay.style.display = 'none';
     alert('✅ Environmental data saved successfully!');
   } catch (error) {
@@ -83,60 +80,24 @@ async function readSensor() {
   }
 }
 
-async function updateResultWithIoT(temp, hum, shelfLife) {
+async function updateResultWithIoT(temp, hum) {
   try {
-    await fetch('http://127.0.0.1:5000/update_result', {
+    const response = await fetch('http://127.0.0.1:5000/update_result', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
         result_id: currentResultId,
         temperature: temp,
-        humidity: hum,
-        shelf_life: shelfLife
+        humidity: hum
       })
     });
+    return await response.json();
   } catch (error) {
     console.error('Update error:', error);
+    return null;
   }
 }
 
-function calculateShelfLife(ripeness, temp, hum) {
-  const baseShelfLife = {
-    'Unripe': [5, 7],
-    'Ripe': [2, 3],
-    'Overripe': [0, 0]
-  };
-  
-  if (!baseShelfLife[ripeness]) return 'N/A';
-  
-  let [low, high] = baseShelfLife[ripeness];
-  
-  if (ripeness === 'Overripe') {
-    return '0 days';
-  }
-  
-  if (temp === null || hum === null) {
-    return `${low}-${high} days`;
-  }
-  
-  let factor = 1.0;
-  
-  if (temp > 30) {
-    factor = 0.6;
-  } else if (temp >= 20 && temp <= 30 && hum >= 50 && hum <= 80) {
-    factor = 1.0;
-  } else if (temp < 20 && hum >= 55 && hum <= 65) {
-    factor = 1.2;
-  } else {
-    factor = 0.8;
-  }
-  
-  const adjLow = Math.max(0, Math.round(low * factor));
-  const adjHigh = Math.max(0, Math.round(high * factor));
-  
-  return `${adjLow}-${adjHigh} days`;
-}
-
 function scanAnotherImage() {
   sessionStorage.clear();
   window.location.href = 'preview.html';